@@ -0,0 +1,98 @@
+import threading
+from functools import partial
+
+import psycopg2
+import psycopg2.extras
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.utils.functional import cached_property
+
+from .pool import ConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def connect(conn_params, isolation_level=None):
+    connection = psycopg2.connect(**conn_params)
+    if (isolation_level is not None
+            and isolation_level != connection.isolation_level):
+        connection.set_session(isolation_level=isolation_level)
+    psycopg2.extras.register_default_jsonb(
+        conn_or_curs=connection, loads=lambda x: x
+    )
+    return connection
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_done = False
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    @cached_property
+    def pool(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if options is None or options is False:
+            return None
+        if options is True:
+            options = {}
+        if self.settings_dict['CONN_MAX_AGE']:
+            raise ImproperlyConfigured(
+                'Пул соединений нельзя совмещать с CONN_MAX_AGE.'
+            )
+        with _pools_lock:
+            if self.alias not in _pools:
+                _pools[self.alias] = ConnectionPool(
+                    partial(
+                        connect,
+                        self.get_connection_params(),
+                        self.settings_dict['OPTIONS'].get('isolation_level'),
+                    ),
+                    max_size=options.get('max_size', 10),
+                    timeout=options.get('timeout', 10),
+                    check=self.health_check_enabled,
+                )
+            return _pools[self.alias]
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        if self.pool is None:
+            return super().get_new_connection(conn_params)
+        connection = self.pool.acquire()
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            self.pool.release(self.connection)
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (self.connection is None
+                or not self.health_check_enabled
+                or self.health_check_done):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
@@ -0,0 +1,80 @@
+import threading
+
+from psycopg2 import Error, OperationalError
+from psycopg2.extensions import (TRANSACTION_STATUS_IDLE,
+                                 TRANSACTION_STATUS_UNKNOWN)
+
+
+def is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Error:
+        return False
+    return True
+
+
+class ConnectionPool:
+    def __init__(self, connect, max_size, timeout, check=False):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check = check
+        self.idle = []
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_size)
+
+    def acquire(self):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise OperationalError(
+                f'Все {self.max_size} соединений пула заняты дольше '
+                f'{self.timeout} с'
+            )
+        try:
+            return self.take()
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def take(self):
+        while True:
+            with self.lock:
+                connection = self.idle.pop() if self.idle else None
+            if connection is None:
+                return self.connect()
+            if connection.closed:
+                continue
+            if self.check and not is_usable(connection):
+                self.discard(connection)
+                continue
+            return connection
+
+    def release(self, connection):
+        try:
+            if connection.closed:
+                return
+            status = connection.info.transaction_status
+            if status == TRANSACTION_STATUS_UNKNOWN:
+                self.discard(connection)
+                return
+            if status != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            with self.lock:
+                self.idle.append(connection)
+        except Error:
+            self.discard(connection)
+        finally:
+            self.slots.release()
+
+    @staticmethod
+    def discard(connection):
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection in idle:
+            self.discard(connection)
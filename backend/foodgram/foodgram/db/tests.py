@@ -0,0 +1,196 @@
+from unittest import mock
+
+import psycopg2
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.utils import load_backend
+from django.test import SimpleTestCase
+from psycopg2.extensions import (TRANSACTION_STATUS_IDLE,
+                                 TRANSACTION_STATUS_INTRANS,
+                                 TRANSACTION_STATUS_UNKNOWN)
+
+from foodgram.db.postgresql import base
+from foodgram.db.postgresql.pool import ConnectionPool
+
+BACKEND = 'foodgram.db.postgresql'
+
+
+class FakeCursor:
+    query = None
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, params=None):
+        if self.connection.broken:
+            raise psycopg2.OperationalError('server closed the connection')
+        self.connection.executed.append(sql)
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    isolation_level = None
+    autocommit = False
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.executed = []
+        self.rollbacks = 0
+        self.info = mock.Mock(transaction_status=TRANSACTION_STATUS_IDLE)
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = 1
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def commit(self):
+        pass
+
+    def get_parameter_status(self, name):
+        return 'UTC'
+
+    def set_session(self, **kwargs):
+        pass
+
+    def set_client_encoding(self, encoding):
+        pass
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.made = []
+        self.pool = ConnectionPool(
+            self.connect, max_size=2, timeout=0.05, check=True
+        )
+
+    def connect(self):
+        self.made.append(FakeConnection())
+        return self.made[-1]
+
+    def test_reuses_released_connection(self):
+        first = self.pool.acquire()
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(), first)
+        self.assertEqual(len(self.made), 1)
+
+    def test_times_out_when_exhausted(self):
+        self.pool.acquire()
+        self.pool.acquire()
+        with self.assertRaises(psycopg2.OperationalError):
+            self.pool.acquire()
+
+    def test_release_frees_slot(self):
+        first = self.pool.acquire()
+        self.pool.acquire()
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(), first)
+
+    def test_rolls_back_open_transaction_on_release(self):
+        first = self.pool.acquire()
+        first.info.transaction_status = TRANSACTION_STATUS_INTRANS
+        self.pool.release(first)
+        self.assertEqual(first.rollbacks, 1)
+        self.assertEqual(self.pool.idle, [first])
+
+    def test_drops_closed_and_unknown_connections(self):
+        closed, unknown = self.pool.acquire(), self.pool.acquire()
+        closed.closed = 1
+        unknown.info.transaction_status = TRANSACTION_STATUS_UNKNOWN
+        self.pool.release(closed)
+        self.pool.release(unknown)
+        self.assertEqual(self.pool.idle, [])
+        self.assertTrue(unknown.closed)
+
+    def test_replaces_broken_connection(self):
+        first = self.pool.acquire()
+        self.pool.release(first)
+        first.broken = True
+        second = self.pool.acquire()
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+
+
+@mock.patch.object(base.psycopg2.extras, 'register_default_jsonb')
+class DatabaseWrapperTests(SimpleTestCase):
+    def setUp(self):
+        self.made = []
+        patcher = mock.patch.object(
+            base.base.Database, 'connect', side_effect=self.connect
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        base._pools.clear()
+        self.addCleanup(base._pools.clear)
+
+    def connect(self, **kwargs):
+        self.made.append(FakeConnection())
+        return self.made[-1]
+
+    def wrapper(self, alias, **overrides):
+        settings_dict = {
+            **connection.settings_dict,
+            'ENGINE': BACKEND,
+            'NAME': 'foodgram',
+            'USER': 'foodgram',
+            'HOST': 'localhost',
+            'PORT': '5432',
+            'TIME_ZONE': None,
+            'OPTIONS': {},
+            **overrides,
+        }
+        return load_backend(BACKEND).DatabaseWrapper(settings_dict, alias)
+
+    def request(self, wrapper):
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 2')
+        wrapper.close_if_unusable_or_obsolete()
+
+    def test_persistent_connection_is_health_checked(self, register):
+        wrapper = self.wrapper(
+            'persistent', CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True
+        )
+        for _ in range(3):
+            self.request(wrapper)
+        self.assertEqual(len(self.made), 1)
+        self.assertEqual(self.made[0].executed.count('SELECT 1'), 2)
+        self.made[0].broken = True
+        self.request(wrapper)
+        self.assertEqual(len(self.made), 2)
+        self.assertTrue(self.made[0].closed)
+
+    def test_pooled_connection_is_reused(self, register):
+        wrapper = self.wrapper(
+            'pooled', CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=True,
+            OPTIONS={'pool': {'max_size': 2, 'timeout': 1}},
+        )
+        self.assertNotIn('pool', wrapper.get_connection_params())
+        for _ in range(3):
+            self.request(wrapper)
+        self.assertEqual(len(self.made), 1)
+        self.assertFalse(self.made[0].closed)
+        self.assertEqual(wrapper.pool.idle, self.made)
+
+    def test_pool_rejects_persistent_connections(self, register):
+        wrapper = self.wrapper(
+            'invalid', CONN_MAX_AGE=60, OPTIONS={'pool': True}
+        )
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.pool
@@ -0,0 +1,145 @@
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('foodgram.requests')
+
+PLACEHOLDERS = re.compile(r'\((?:%s,\s*)+%s\)')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def repeated(self, threshold):
+        templates = Counter()
+        for sql, count in self.statements.items():
+            templates[PLACEHOLDERS.sub('(...)', sql)] += count
+        return [
+            (sql, count) for sql, count in templates.most_common()
+            if count > threshold
+        ]
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+class TimedSerializerMixin:
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None:
+            return super().to_representation(instance)
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_time += time.perf_counter() - started
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.REQUEST_METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with self.track(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if response.streaming:
+            response.streaming_content = self.stream(
+                request, response, metrics, response.streaming_content
+            )
+            return response
+        if self.exposes_timing(request):
+            self.add_server_timing(response, metrics)
+        self.report(request, response, metrics, len(response.content))
+        return response
+
+    @staticmethod
+    def track(metrics):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+        return stack
+
+    def stream(self, request, response, metrics, content):
+        size = 0
+        try:
+            with self.track(metrics):
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            self.report(request, response, metrics, size)
+
+    @staticmethod
+    def exposes_timing(request):
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            return True
+        user = getattr(request, 'user', None)
+        return bool(user and user.is_staff)
+
+    @staticmethod
+    def add_server_timing(response, metrics):
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={metrics.db_time * 1000:.1f};'
+            f'desc="{metrics.queries} queries"',
+            f'serializer;dur={metrics.serializer_time * 1000:.1f}',
+            f'total;dur={metrics.elapsed() * 1000:.1f}',
+        ))
+
+    def report(self, request, response, metrics, size):
+        total = metrics.elapsed()
+        match = getattr(request, 'resolver_match', None)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_time * 1000, 1),
+            'serializer_ms': round(metrics.serializer_time * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+            'bytes': size,
+            'cache': response.get('X-Cache'),
+        }
+        logger.info(json.dumps(record, ensure_ascii=False))
+        for sql, count in metrics.repeated(
+            settings.REQUEST_METRICS_N_PLUS_ONE_THRESHOLD
+        ):
+            logger.warning(json.dumps(
+                {**record, 'repeated': count, 'sql': sql[:500]},
+                ensure_ascii=False,
+            ))
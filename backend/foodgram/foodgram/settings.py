@@ -1,6 +1,8 @@
 import os
+from datetime import timedelta
 
 import environ
+from django.core.exceptions import ImproperlyConfigured
 
 environ.Env.read_env()
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -23,6 +25,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,14 +56,46 @@ TEMPLATES = [
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 
+DB_ENGINE = os.environ.get('DB_ENGINE')
+POOLED_DB_ENGINE = 'foodgram.db.postgresql'
 DATABASES = {
     'default': {
-        'ENGINE': os.environ.get('DB_ENGINE'),
+        'ENGINE': DB_ENGINE,
         'NAME': os.environ.get('POSTGRES_DB'),
         'USER': os.environ.get('POSTGRES_USER'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
+        'CONN_MAX_AGE': int(os.environ.get(
+            'DB_CONN_MAX_AGE', 60 if DB_ENGINE == POOLED_DB_ENGINE else 0
+        )),
+    }
+}
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+if DB_ENGINE == POOLED_DB_ENGINE:
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = (
+        os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1'
+    )
+    if DB_POOL_MAX_SIZE:
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            },
+        }
+elif DB_POOL_MAX_SIZE:
+    raise ImproperlyConfigured(
+        f'DB_POOL_MAX_SIZE работает только с DB_ENGINE={POOLED_DB_ENGINE}.'
+    )
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'foodgram'),
     }
 }
 
@@ -90,7 +125,7 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.TokenAuthentication',
     ],
 
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'recipes.pagination.PageLimitPagination',
     'PAGE_SIZE': 3,
 
     'DEFAULT_FILTER_BACKENDS': (
@@ -102,6 +137,40 @@ DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 STATIC_ROOT = os.path.join(BASE_DIR, 'dj_static')
 MEDIA_ROOT = os.path.join(BASE_DIR, 'dj_media')
 MEDIA_URL = '/dj_media/'
+DEFAULT_FILE_STORAGE = 'recipes.storage.ContentHashStorage'
+INGREDIENT_SEARCH_LIMIT = 20
+TAG_IDS_TIMEOUT = 60
+RECIPE_RESPONSE_CACHE_TIMEOUT = 60
+RECIPE_FRAGMENT_CACHE_TIMEOUT = 60
+RECIPE_SEARCH_CONFIG = 'russian'
+CATALOG_IMPORT_BATCH_SIZE = 1000
+CATALOG_IMPORT_MAX_BYTES = 10 * 1024 * 1024
+REQUEST_METRICS_SAMPLE_RATE = float(
+    os.environ.get('REQUEST_METRICS_SAMPLE_RATE', 0.1)
+)
+REQUEST_METRICS_N_PLUS_ONE_THRESHOLD = 10
+REQUEST_METRICS_SERVER_TIMING = (
+    os.environ.get('REQUEST_METRICS_SERVER_TIMING', '0') == '1'
+)
+RECIPE_IMAGE_MAX_BYTES = 15 * 1024 * 1024
+RECIPE_IMAGE_MAX_PIXELS = 25_000_000
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': (160, 160),
+    'card': (600, 600),
+    'full': (1600, 1600),
+}
+RECIPE_IMAGE_FORMATS = {
+    'webp': {'quality': 80, 'method': 4},
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+RECIPE_SCORE_WEIGHTS = {'favorite': 1.0, 'cart': 1.0}
+RECIPE_TRENDING_HALF_LIFE = timedelta(days=3)
+RECIPE_TRENDING_WINDOW = timedelta(days=14)
+SHOPPING_LIST_PDF_FONT = os.environ.get(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
 STATIC_URL = '/dj_static/'
 
 LANGUAGE_CODE = 'en-us'
@@ -122,3 +191,24 @@ DJOSER = {
         'user': 'recipes.serializers.CustomUserSerializer',
     },
 }
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'metrics': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'foodgram.requests': {
+            'handlers': ['metrics'],
+            'level': os.environ.get('REQUEST_METRICS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,174 @@
+import re
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Exists, OuterRef
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .models import Ingredient, Recipe, ShopingCart, Tag
+
+User = get_user_model()
+
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+COMPARED = ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'throughput')
+
+
+def benchmark_user():
+    return User.objects.annotate(
+        follows=Count('followers', distinct=True),
+        has_cart=Exists(ShopingCart.objects.filter(user=OuterRef('pk'))),
+    ).filter(has_cart=True).order_by('-follows', 'pk').first()
+
+
+def scenarios():
+    slugs = list(Tag.objects.values_list('slug', flat=True)[:2])
+    ingredient = Ingredient.objects.order_by('pk').values_list(
+        'name', flat=True
+    ).first() or ''
+    recipe = Recipe.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first()
+    return [
+        ('recipes', '/api/recipes/', {'limit': 6}, False),
+        ('recipes_auth', '/api/recipes/', {'limit': 6}, True),
+        ('recipes_page_10', '/api/recipes/', {'limit': 6, 'page': 10},
+         False),
+        ('recipes_tags', '/api/recipes/', {'limit': 6, 'tags': slugs},
+         True),
+        ('recipes_favorited', '/api/recipes/',
+         {'limit': 6, 'is_favorited': 'true'}, True),
+        ('recipes_in_cart', '/api/recipes/',
+         {'limit': 6, 'is_in_shopping_cart': 'true'}, True),
+        ('recipes_feed', '/api/recipes/',
+         {'limit': 6, 'feed': 'following'}, True),
+        ('recipes_search', '/api/recipes/',
+         {'limit': 6, 'search': 'рецепт'}, True),
+        ('recipe_detail', f'/api/recipes/{recipe}/', {}, True),
+        ('ingredients_name', '/api/ingredients/',
+         {'name': ingredient[:3]}, False),
+        ('subscriptions', '/api/users/subscriptions/', {'limit': 6}, True),
+        ('download_shopping_cart', '/api/recipes/download_shopping_cart/',
+         {}, True),
+    ]
+
+
+def parse_server_timing(header):
+    match = SERVER_TIMING_DB.search(header or '')
+    if match is None:
+        return None, None
+    return int(match.group(2)), float(match.group(1))
+
+
+class InProcessClient:
+    concurrent = False
+
+    def __init__(self, token):
+        self.anonymous = APIClient()
+        self.authorized = APIClient()
+        self.authorized.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def get(self, path, params, auth):
+        client = self.authorized if auth else self.anonymous
+        started = time.perf_counter()
+        response = client.get(path, params)
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        elapsed = time.perf_counter() - started
+        return (
+            response.status_code, elapsed, size,
+            response.get('Server-Timing'),
+        )
+
+
+class LiveClient:
+    concurrent = True
+
+    def __init__(self, token, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.headers = {'Authorization': f'Token {token}'}
+        self.session = requests.Session()
+
+    def get(self, path, params, auth):
+        started = time.perf_counter()
+        response = self.session.get(
+            self.base_url + path, params=params,
+            headers=self.headers if auth else None,
+        )
+        size = len(response.content)
+        elapsed = time.perf_counter() - started
+        return (
+            response.status_code, elapsed, size,
+            response.headers.get('Server-Timing'),
+        )
+
+
+def percentile(quantiles, value):
+    return round(quantiles[value - 1] * 1000, 2)
+
+
+def summarize(results, wall_time):
+    latencies = [elapsed for status, elapsed, size, timing in results]
+    timings = [parse_server_timing(timing) for *_, timing in results]
+    queries = [count for count, db_ms in timings if count is not None]
+    db_times = [db_ms for count, db_ms in timings if db_ms is not None]
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'requests': len(results),
+        'errors': sum(status >= 400 for status, *_ in results),
+        'p50_ms': percentile(quantiles, 50),
+        'p95_ms': percentile(quantiles, 95),
+        'p99_ms': percentile(quantiles, 99),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'queries': max(queries) if queries else None,
+        'db_ms': round(statistics.mean(db_times), 2) if db_times else None,
+        'bytes': results[-1][2],
+        'throughput': round(len(results) / wall_time, 1),
+    }
+
+
+def run_scenario(client, path, params, auth, requests_count, warmup=0,
+                 concurrency=1):
+    for _ in range(warmup):
+        client.get(path, params, auth)
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(
+                lambda _: client.get(path, params, auth),
+                range(requests_count),
+            ))
+    else:
+        results = [
+            client.get(path, params, auth) for _ in range(requests_count)
+        ]
+    return summarize(results, time.perf_counter() - started)
+
+
+def compare(current, baseline):
+    changes = {}
+    for name, result in current.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        changes[name] = {}
+        for metric in COMPARED:
+            before, after = previous.get(metric), result.get(metric)
+            if before is None or after is None:
+                continue
+            changes[name][metric] = {
+                'before': before,
+                'after': after,
+                'change': round((after - before) / before * 100, 1)
+                if before else None,
+            }
+    return changes
+
+
+def get_token(user):
+    return Token.objects.get_or_create(user=user)[0].key
@@ -0,0 +1,102 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Tag
+
+TAG_IDS_KEY = 'recipes:tag-ids'
+RESPONSE_PREFIX = 'recipes:response'
+RESPONSE_STATS = ('hits', 'misses')
+
+
+def reference_key(table, version):
+    return f'reference:{table}:{version}'
+
+
+def get_reference_blob(counter, build):
+    key = reference_key(counter.table, counter.version)
+    blob = cache.get(key)
+    if blob is None:
+        blob = build()
+        cache.set(key, blob, timeout=None)
+    return blob
+
+
+def drop_reference_blob(counter):
+    cache.delete(reference_key(counter.table, counter.version - 1))
+
+
+def get_tag_ids():
+    tag_ids = cache.get(TAG_IDS_KEY)
+    if tag_ids is None:
+        tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(TAG_IDS_KEY, tag_ids, settings.TAG_IDS_TIMEOUT)
+    return tag_ids
+
+
+def tag_choices():
+    return [(slug, slug) for slug in get_tag_ids()]
+
+
+def drop_tag_ids():
+    cache.delete(TAG_IDS_KEY)
+
+
+def increment(key, initial):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, initial, timeout=None)
+        return cache.incr(key)
+
+
+def generation_key(name):
+    return f'{RESPONSE_PREFIX}:generation:{name}'
+
+
+def get_generations(*names):
+    keys = [generation_key(name) for name in names]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump_generations(*names):
+    for name in names:
+        increment(generation_key(name), time.time_ns())
+
+
+def recipe_generation(pk):
+    return f'recipe:{pk}'
+
+
+def response_key(kind, generations, request):
+    params = sorted(
+        (name, sorted(values))
+        for name, values in request.query_params.lists()
+        if any(values)
+    )
+    digest = hashlib.sha1(repr((
+        request.scheme, request.get_host(), request.path, params
+    )).encode()).hexdigest()
+    versions = '.'.join(str(generation) for generation in generations)
+    return f'{RESPONSE_PREFIX}:{kind}:{versions}:{digest}'
+
+
+def count_response(hit):
+    increment(f'{RESPONSE_PREFIX}:{RESPONSE_STATS[not hit]}', 0)
+
+
+def response_stats(reset=False):
+    keys = [f'{RESPONSE_PREFIX}:{name}' for name in RESPONSE_STATS]
+    found = cache.get_many(keys)
+    if reset:
+        cache.delete_many(keys)
+    return {
+        name: found.get(key, 0) for name, key in zip(RESPONSE_STATS, keys)
+    }
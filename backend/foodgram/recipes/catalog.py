@@ -0,0 +1,301 @@
+import csv
+import json
+import os
+import time
+from collections import Counter
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from pytils.translit import slugify
+from rest_framework import serializers
+
+from .cache import bump_generations, drop_reference_blob, drop_tag_ids
+from .counters import recount_users
+from .fulltext import reindex_on_commit
+from .ingredient_index import ingredient_index
+from .models import ChangeCounter, Ingredient, IngredientRecipe, Recipe, Tag
+from .serializers import (ImportIngredientSerializer, ImportRecipeSerializer,
+                          ImportTagSerializer)
+
+User = get_user_model()
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\r\n,[]'
+
+
+def read_json(stream, model=None):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    for chunk in iter(partial(stream.read, CHUNK_SIZE), ''):
+        buffer = (buffer + chunk).lstrip(WHITESPACE)
+        while buffer:
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except ValueError:
+                break
+            yield record(item, model)
+            buffer = buffer[end:].lstrip(WHITESPACE)
+    if buffer:
+        raise ValueError('Некорректный JSON в конце файла.')
+
+
+def record(item, model):
+    if isinstance(item, dict) and 'fields' in item:
+        return item.get('model', '').split('.')[-1], item['fields']
+    return model, item
+
+
+def split(value, separator=';'):
+    return [part.strip() for part in value.split(separator) if part.strip()]
+
+
+def read_csv(stream, model):
+    for row in csv.DictReader(stream):
+        if model == 'recipe':
+            row['tags'] = split(row.get('tags') or '')
+            row['ingredients'] = [
+                dict(zip(
+                    ('name', 'measurement_unit', 'amount'),
+                    item.rsplit(':', 2)
+                ))
+                for item in split(row.get('ingredients') or '')
+            ]
+        yield model, row
+
+
+READERS = {
+    'json': read_json,
+    'jsonl': read_json,
+    'csv': read_csv,
+}
+
+
+def reader_for(name, file_format=None):
+    file_format = (
+        file_format
+        or os.path.splitext(name)[1].lstrip('.').lower()
+        or 'json'
+    )
+    if file_format not in READERS:
+        raise ValueError(f'Неизвестный формат: {file_format}.')
+    return READERS[file_format]
+
+
+class CatalogImporter:
+    order = ('tag', 'ingredient', 'recipe')
+    serializer_classes = {
+        'tag': ImportTagSerializer,
+        'ingredient': ImportIngredientSerializer,
+        'recipe': ImportRecipeSerializer,
+    }
+    max_errors = 100
+
+    def __init__(self, batch_size=1000, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.buffers = {label: [] for label in self.order}
+        self.imported = Counter()
+        self.errors = []
+        self.error_count = 0
+        self.author_ids = set()
+        self.started = None
+
+    def run(self, records):
+        self.started = time.monotonic()
+        try:
+            for number, (label, data) in enumerate(records, 1):
+                if label not in self.buffers:
+                    self.error(number, f'Неизвестная модель: {label}.')
+                    continue
+                self.buffers[label].append((number, data))
+                if len(self.buffers[label]) >= self.batch_size:
+                    self.flush(label)
+            self.flush(self.order[-1])
+        finally:
+            self.finish()
+        return self.report()
+
+    def flush(self, label):
+        for dependency in self.order[:self.order.index(label) + 1]:
+            rows = self.validate(dependency, self.buffers[dependency])
+            self.buffers[dependency] = []
+            if not rows:
+                continue
+            with transaction.atomic():
+                getattr(self, f'import_{dependency}s')(rows)
+            if self.progress:
+                self.progress(self.report())
+
+    def validate(self, label, rows):
+        serializer = self.serializer_classes[label]()
+        valid = []
+        for number, data in rows:
+            try:
+                valid.append((number, serializer.run_validation(data)))
+            except serializers.ValidationError as error:
+                self.error(number, error.detail)
+        return valid
+
+    def error(self, number, detail):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'record': number, 'errors': detail})
+
+    def import_tags(self, rows):
+        tags = {}
+        for number, data in rows:
+            data['slug'] = data.get('slug') or slugify(data['name'])[:100]
+            tags[data['slug']] = data
+        existing = Tag.objects.in_bulk(list(tags), field_name='slug')
+        for slug, tag in existing.items():
+            tag.name = tags[slug]['name']
+            tag.color = tags[slug]['color']
+        Tag.objects.bulk_update(existing.values(), ['name', 'color'])
+        Tag.objects.bulk_create(
+            [Tag(**data) for slug, data in tags.items()
+             if slug not in existing],
+            ignore_conflicts=True,
+        )
+        self.imported['tag'] += len(rows)
+
+    def import_ingredients(self, rows):
+        Ingredient.objects.bulk_create(
+            [Ingredient(**data) for number, data in rows],
+            ignore_conflicts=True,
+        )
+        self.imported['ingredient'] += len(rows)
+
+    def import_recipes(self, rows):
+        rows = self.resolve(rows)
+        recipes = {(data['author_id'], data['name']): data for data in rows}
+        existing = self.recipe_ids(recipes)
+        changed = []
+        for key, pk in existing.items():
+            data = recipes[key]
+            changed.append(Recipe(
+                pk=pk,
+                text=data['text'],
+                cooking_time=data['cooking_time'],
+            ))
+        Recipe.objects.bulk_update(changed, ['text', 'cooking_time'])
+        IngredientRecipe.objects.filter(
+            recipe_id__in=existing.values()
+        ).delete()
+        Recipe.tags.through.objects.filter(
+            recipe_id__in=existing.values()
+        ).delete()
+        Recipe.objects.bulk_create([
+            Recipe(
+                author_id=data['author_id'],
+                name=data['name'],
+                text=data['text'],
+                cooking_time=data['cooking_time'],
+            )
+            for key, data in recipes.items() if key not in existing
+        ])
+        ids = self.recipe_ids(recipes)
+        self.create_relations(recipes, ids)
+        reindex_on_commit(ids.values())
+        self.author_ids.update(author_id for author_id, name in recipes)
+        self.imported['recipe'] += len(rows)
+
+    def resolve(self, rows):
+        authors = self.author_lookup(data['author'] for _, data in rows)
+        tags = dict(Tag.objects.filter(
+            slug__in={slug for _, data in rows for slug in data['tags']}
+        ).values_list('slug', 'id'))
+        ingredients = self.ingredient_lookup(
+            item for _, data in rows for item in data['ingredients']
+        )
+        resolved = []
+        for number, data in rows:
+            try:
+                data['author_id'] = authors[data['author']]
+                data['tags'] = [tags[slug] for slug in data['tags']]
+                for item in data['ingredients']:
+                    item['ingredient_id'] = ingredients[
+                        item.get('id')
+                        or (item['name'], item['measurement_unit'])
+                    ]
+            except KeyError as error:
+                self.error(number, f'Объект не найден: {error.args[0]}.')
+                continue
+            resolved.append(data)
+        return resolved
+
+    def author_lookup(self, values):
+        values = set(values)
+        ids = {int(value) for value in values if value.isdigit()}
+        lookup = {}
+        for pk, email in User.objects.filter(
+            Q(pk__in=ids) | Q(email__in=values)
+        ).values_list('pk', 'email'):
+            lookup[str(pk)] = lookup[email] = pk
+        return lookup
+
+    def ingredient_lookup(self, items):
+        ids, names = set(), set()
+        for item in items:
+            if item.get('id'):
+                ids.add(item['id'])
+            else:
+                names.add(item['name'])
+        lookup = {}
+        for pk, name, unit in Ingredient.objects.filter(
+            Q(pk__in=ids) | Q(name__in=names)
+        ).values_list('pk', 'name', 'measurement_unit'):
+            lookup[pk] = lookup[(name, unit)] = pk
+        return lookup
+
+    def recipe_ids(self, recipes):
+        found = Recipe.objects.filter(
+            author_id__in={author_id for author_id, name in recipes},
+            name__in={name for author_id, name in recipes},
+        ).values_list('author_id', 'name', 'pk')
+        return {
+            (author_id, name): pk for author_id, name, pk in found
+            if (author_id, name) in recipes
+        }
+
+    def create_relations(self, recipes, ids):
+        IngredientRecipe.objects.bulk_create([
+            IngredientRecipe(
+                recipe_id=ids[key],
+                ingredient_id=item['ingredient_id'],
+                amount=item['amount'],
+            )
+            for key, data in recipes.items()
+            for item in data['ingredients']
+        ], batch_size=self.batch_size)
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=ids[key], tag_id=tag_id)
+            for key, data in recipes.items()
+            for tag_id in set(data['tags'])
+        ], batch_size=self.batch_size)
+
+    def finish(self):
+        if self.author_ids:
+            recount_users(User.objects.filter(pk__in=self.author_ids))
+        for label, model in (('tag', Tag), ('ingredient', Ingredient)):
+            if self.imported[label]:
+                ChangeCounter.bump(model)
+                drop_reference_blob(ChangeCounter.get_for_model(model))
+        if self.imported['ingredient']:
+            ingredient_index.invalidate()
+        if self.imported['tag']:
+            drop_tag_ids()
+        if self.imported:
+            bump_generations('catalog')
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        total = sum(self.imported.values())
+        return {
+            'imported': dict(self.imported),
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'seconds': round(elapsed, 3),
+            'per_second': round(total / elapsed) if elapsed else total,
+        }
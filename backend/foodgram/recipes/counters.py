@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import Follow
+from .models import Favorite, Recipe, ShopingCart
+
+User = get_user_model()
+
+
+def shift(model, pk, field, delta):
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def count_of(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field)
+        .annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def recount_recipes(queryset=None):
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    return queryset.update(
+        favorites_count=count_of(Favorite, 'recipe'),
+        in_carts_count=count_of(ShopingCart, 'recipe'),
+    )
+
+
+def recount_users(queryset=None):
+    if queryset is None:
+        queryset = User.objects.all()
+    return queryset.update(
+        recipes_count=count_of(Recipe, 'author'),
+        followers_count=count_of(Follow, 'following'),
+    )
@@ -0,0 +1,144 @@
+import csv
+import io
+import json
+import logging
+import os
+from datetime import datetime
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFError, TTFont
+from reportlab.pdfgen import canvas
+from rest_framework.renderers import BaseRenderer
+
+logger = logging.getLogger(__name__)
+
+
+class ShoppingListExporter(BaseRenderer):
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b''.join(
+            chunk.encode(self.charset) if isinstance(chunk, str) else chunk
+            for chunk in self.export(data)
+        )
+
+    def export(self, rows):
+        raise NotImplementedError
+
+    def is_available(self):
+        return True
+
+    @staticmethod
+    def title():
+        return f'Список покупок на {datetime.now().date()}'
+
+
+class TextExporter(ShoppingListExporter):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def export(self, rows):
+        yield f'{self.title()} \n'
+        yield '\n'
+        for row in rows:
+            yield (f"{row['name']} - {row['total']}"
+                   f"{row['measurement_unit']} \n")
+        yield '\n\n'
+        yield f'foodgram {datetime.now().year}'
+
+
+class EchoBuffer:
+    def write(self, value):
+        return value
+
+
+class CsvExporter(ShoppingListExporter):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def export(self, rows):
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(('name', 'amount', 'measurement_unit'))
+        for row in rows:
+            yield writer.writerow(
+                (row['name'], row['total'], row['measurement_unit'])
+            )
+
+
+class JsonExporter(ShoppingListExporter):
+    media_type = 'application/json'
+    format = 'json'
+
+    def export(self, rows):
+        separator = '['
+        for row in rows:
+            yield separator + json.dumps({
+                'name': row['name'],
+                'amount': row['total'],
+                'measurement_unit': row['measurement_unit'],
+            }, ensure_ascii=False)
+            separator = ','
+        yield '[]' if separator == '[' else ']'
+
+
+class PdfExporter(ShoppingListExporter):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    font_size = 11
+    line_height = 6 * mm
+    margin = 20 * mm
+    chunk_size = 64 * 1024
+
+    def get_font(self):
+        path = settings.SHOPPING_LIST_PDF_FONT
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name in pdfmetrics.getRegisteredFontNames():
+            return name
+        try:
+            pdfmetrics.registerFont(TTFont(name, path))
+        except (OSError, TTFError):
+            logger.warning(
+                'Не удалось загрузить шрифт %s для PDF, список покупок '
+                'будет выгружен текстом', path
+            )
+            return None
+        return name
+
+    def is_available(self):
+        return self.get_font() is not None
+
+    def export(self, rows):
+        buffer = io.BytesIO()
+        font = self.get_font()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        width, height = A4
+        top = height - self.margin
+        pdf.setFont(font, self.font_size + 3)
+        pdf.drawString(self.margin, top, self.title())
+        y = top - 2 * self.line_height
+        pdf.setFont(font, self.font_size)
+        for row in rows:
+            if y < self.margin:
+                pdf.showPage()
+                pdf.setFont(font, self.font_size)
+                y = top
+            pdf.drawString(
+                self.margin, y,
+                f"{row['name']} - {row['total']} {row['measurement_unit']}"
+            )
+            y -= self.line_height
+        pdf.save()
+        buffer.seek(0)
+        yield from iter(lambda: buffer.read(self.chunk_size), b'')
+
+
+SHOPPING_LIST_EXPORTERS = (
+    TextExporter,
+    CsvExporter,
+    JsonExporter,
+    PdfExporter,
+)
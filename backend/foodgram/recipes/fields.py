@@ -0,0 +1,110 @@
+import base64
+import binascii
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.fields import ImageField
+
+BASE64_MARKER = ';base64,'
+
+
+class DecodedImageFile(TemporaryUploadedFile):
+    def __del__(self):
+        self.close()
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    def to_representation(self, variants):
+        request = self.context.get('request')
+        urls = {}
+        for variant, files in variants.items():
+            urls[variant] = {}
+            for extension, name in files.items():
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                urls[variant][extension] = url
+        return urls
+
+
+class RecipeImageField(Base64ImageField):
+    chunk_size = 64 * 1024
+
+    def to_internal_value(self, data):
+        if data in self.EMPTY_VALUES:
+            return None
+        if isinstance(data, UploadedFile):
+            self.check_size(data.size)
+            self.identify(data)
+            data.seek(0)
+            return ImageField.to_internal_value(self, data)
+        if isinstance(data, str):
+            return ImageField.to_internal_value(self, self.decode(data))
+        return super().to_internal_value(data)
+
+    def check_size(self, size):
+        if size > settings.RECIPE_IMAGE_MAX_BYTES:
+            raise serializers.ValidationError(
+                'Размер картинки не должен превышать '
+                f'{settings.RECIPE_IMAGE_MAX_BYTES // 1024 // 1024} МБ.'
+            )
+
+    def identify(self, file):
+        try:
+            with Image.open(file) as image:
+                width, height = image.size
+                image_format = image.format.lower()
+        except Image.DecompressionBombError:
+            self.reject_resolution()
+        except (OSError, SyntaxError, AttributeError):
+            return None
+        if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+            self.reject_resolution()
+        return image_format
+
+    def reject_resolution(self):
+        raise serializers.ValidationError(
+            'Разрешение картинки слишком велико.'
+        )
+
+    def decode(self, data):
+        start = data.find(BASE64_MARKER)
+        start = 0 if start == -1 else start + len(BASE64_MARKER)
+        self.check_size((len(data) - start) * 3 // 4)
+        upload = DecodedImageFile('image', None, 0, None)
+        try:
+            self.write_decoded(upload, data, start)
+            image_format = self.identify(upload.temporary_file_path())
+        except serializers.ValidationError:
+            upload.close()
+            raise
+        if image_format not in self.ALLOWED_TYPES:
+            upload.close()
+            raise serializers.ValidationError(self.INVALID_TYPE_MESSAGE)
+        upload.name = f'{uuid.uuid4()}.{image_format}'
+        upload.size = upload.tell()
+        upload.seek(0)
+        return upload
+
+    def write_decoded(self, upload, data, start):
+        pending = ''
+        for offset in range(start, len(data), self.chunk_size):
+            chunk = pending + ''.join(
+                data[offset:offset + self.chunk_size].split()
+            )
+            cut = len(chunk) - len(chunk) % 4
+            pending = chunk[cut:]
+            try:
+                upload.write(base64.b64decode(chunk[:cut]))
+            except (binascii.Error, ValueError):
+                raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+            if offset == start:
+                upload.flush()
+                self.identify(upload.temporary_file_path())
+        if pending:
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
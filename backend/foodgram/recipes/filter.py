@@ -1,34 +1,47 @@
 import django_filters
-from rest_framework.filters import SearchFilter
+from django.db.models import Exists, OuterRef
 
-from .models import Recipe
-
-
-class IngredientSearchFilter(SearchFilter):
-    search_param = 'name'
+from users.models import Follow
+from .cache import get_tag_ids, tag_choices
+from .fulltext import get_engine
+from .models import Favorite, IngredientRecipe, Recipe, ShopingCart
 
 
 class RecipesFilter(django_filters.FilterSet):
-    tags = django_filters.AllValuesMultipleFilter(
-        field_name='tags__slug',
+    orderings = {
+        'popular': ('-popularity_score', '-pub_date', '-id'),
+        'trending': ('-trending_score', '-pub_date', '-id'),
+    }
+
+    tags = django_filters.MultipleChoiceFilter(
+        choices=tag_choices,
+        method='filter_tags',
     )
 
     author = django_filters.CharFilter(
         field_name='author__id',
     )
     name = django_filters.CharFilter(
-        field_name='ingredients__name',
-        lookup_expr='icontains'
+        method='filter_name',
+    )
+    search = django_filters.CharFilter(
+        method='filter_search',
     )
 
     is_favorited = django_filters.BooleanFilter(
-        field_name='favorites__recipe',
         method='filter_is_favorited',
     )
     is_in_shopping_cart = django_filters.BooleanFilter(
-        field_name='shop_carts__recipe',
         method='filter_is_in_shopping_cart',
     )
+    feed = django_filters.ChoiceFilter(
+        choices=(('following', 'following'),),
+        method='filter_feed',
+    )
+    ordering = django_filters.ChoiceFilter(
+        choices=(('popular', 'popular'), ('trending', 'trending')),
+        method='filter_ordering',
+    )
 
     class Meta:
         model = Recipe
@@ -40,14 +53,47 @@ class RecipesFilter(django_filters.FilterSet):
             'ingredients'
         )
 
-    def filter_is_favorited(self, queryset, name, value):
+    def filter_tags(self, queryset, name, value):
+        tag_ids = get_tag_ids()
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe_id=OuterRef('pk'),
+            tag_id__in=[
+                tag_ids[slug] for slug in value if slug in tag_ids
+            ],
+        )))
+
+    def filter_name(self, queryset, name, value):
+        return queryset.filter(Exists(IngredientRecipe.objects.filter(
+            recipe_id=OuterRef('pk'),
+            ingredient__name__icontains=value,
+        )))
+
+    def filter_search(self, queryset, name, value):
+        return get_engine().search(queryset, value)
+
+    def filter_related_to_user(self, queryset, model, value):
         user = self.request.user
-        if value is True:
-            return queryset.filter(favorites__user=user)
-        return queryset
+        if value is not True:
+            return queryset
+        if user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(Exists(model.objects.filter(
+            user=user, recipe_id=OuterRef('pk')
+        )))
+
+    def filter_is_favorited(self, queryset, name, value):
+        return self.filter_related_to_user(queryset, Favorite, value)
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
+        return self.filter_related_to_user(queryset, ShopingCart, value)
+
+    def filter_feed(self, queryset, name, value):
         user = self.request.user
-        if value is True:
-            return queryset.filter(shop_carts__user=user)
-        return queryset
+        if user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(author_id__in=Follow.objects.filter(
+            user=user
+        ).values('following_id'))
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(*self.orderings[value])
@@ -0,0 +1,89 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import get_generations, recipe_generation
+from .models import Recipe
+from .viewer import ViewerContext, get_viewer
+
+FRAGMENT_PREFIX = 'recipes:fragment'
+PREFETCHED = ('tags', 'recipe_ingredients')
+
+
+def origin(request):
+    if request is None:
+        return 'local'
+    return hashlib.sha1(
+        f'{request.scheme}://{request.get_host()}'.encode()
+    ).hexdigest()[:12]
+
+
+def fragment_keys(pks, request):
+    catalog, *versions = get_generations(
+        'catalog', *(recipe_generation(pk) for pk in pks)
+    )
+    site = origin(request)
+    return {
+        pk: f'{FRAGMENT_PREFIX}:{catalog}.{version}:{site}:{pk}'
+        for pk, version in zip(pks, versions)
+    }
+
+
+def with_relations(recipes, pks):
+    loaded = {
+        recipe.pk: recipe for recipe in recipes
+        if all(name in getattr(recipe, '_prefetched_objects_cache', {})
+               for name in PREFETCHED)
+    }
+    missing = [pk for pk in pks if pk not in loaded]
+    if missing:
+        loaded.update(Recipe.objects.with_relations().in_bulk(missing))
+    return loaded
+
+
+def overlay(fragment, viewer, recipe):
+    data = dict(fragment)
+    data['is_favorited'] = viewer.is_favorited(recipe)
+    data['is_in_shopping_cart'] = viewer.is_in_shopping_cart(recipe)
+    data['author'] = dict(
+        data['author'],
+        is_subscribed=viewer.follows(data['author']['id']),
+    )
+    return data
+
+
+def recipe_fragments(serializer, recipes):
+    timeout = settings.RECIPE_FRAGMENT_CACHE_TIMEOUT
+    pks = [recipe.pk for recipe in recipes]
+    keys = {}
+    fragments = {}
+    if timeout:
+        keys = fragment_keys(pks, serializer.context.get('request'))
+        cached = cache.get_many(keys.values())
+        fragments = {
+            pk: cached[key] for pk, key in keys.items() if key in cached
+        }
+    missing = [pk for pk in pks if pk not in fragments]
+    loaded = with_relations(recipes, missing) if missing else {}
+    viewer = get_viewer(serializer.context)
+    viewer.preload(pks, {
+        fragment['author']['id'] for fragment in fragments.values()
+    } | {recipe.author_id for recipe in loaded.values()})
+    anonymous = ViewerContext()
+    rendered = {
+        pk: overlay(
+            serializer.render_fragment(loaded[pk]), anonymous, loaded[pk]
+        )
+        for pk in missing if pk in loaded
+    }
+    fragments.update(rendered)
+    if timeout and rendered:
+        cache.set_many(
+            {keys[pk]: fragment for pk, fragment in rendered.items()},
+            timeout,
+        )
+    return [
+        overlay(fragments[recipe.pk], viewer, recipe)
+        for recipe in recipes if recipe.pk in fragments
+    ]
@@ -0,0 +1,191 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection, transaction
+from django.db.models import (F, FloatField, Func, Lookup, OuterRef, Q,
+                              Subquery, TextField, Value)
+from django.db.models.functions import Replace
+
+from .models import (IngredientRecipe, Recipe, RecipeSearchDocument,
+                     SearchDocumentField)
+
+FTS_TABLE = RecipeSearchDocument._meta.db_table
+WEIGHTS = {'name': 'A', 'text': 'B', 'ingredients': 'C'}
+BM25_WEIGHTS = (10.0, 4.0, 2.0)
+
+
+def fold(expression):
+    return Replace(
+        Replace(
+            expression, Value('ё'), Value('е'), output_field=TextField()
+        ),
+        Value('Ё'),
+        Value('Е'),
+        output_field=TextField(),
+    )
+
+
+def fold_sql(column):
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+@SearchDocumentField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class Bm25(Func):
+    function = 'bm25'
+    output_field = FloatField()
+
+
+def ingredient_names():
+    return Subquery(
+        IngredientRecipe.objects.filter(recipe_id=OuterRef('pk'))
+        .order_by().values('recipe_id')
+        .annotate(names=StringAgg('ingredient__name', ' '))
+        .values('names')
+    )
+
+
+def terms(query):
+    return re.findall(r'\w+', query.casefold().replace('ё', 'е'))
+
+
+class PostgresSearch:
+    def vector(self):
+        config = settings.RECIPE_SEARCH_CONFIG
+        return (
+            SearchVector(
+                fold(F('name')),
+                weight=WEIGHTS['name'],
+                config=config,
+            )
+            + SearchVector(
+                fold(F('text')),
+                weight=WEIGHTS['text'],
+                config=config,
+            )
+            + SearchVector(
+                fold(ingredient_names()),
+                weight=WEIGHTS['ingredients'],
+                config=config,
+            )
+        )
+
+    def index(self, queryset):
+        return queryset.update(search_vector=self.vector())
+
+    def remove(self, pks):
+        pass
+
+    def search(self, queryset, query):
+        query = SearchQuery(
+            ' '.join(terms(query)),
+            config=settings.RECIPE_SEARCH_CONFIG,
+            search_type='plain',
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query),
+        ).order_by('-search_rank', '-pub_date', '-id')
+
+
+class SqliteSearch:
+    def remove(self, pks):
+        pks = list(pks)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+                f'({", ".join(["%s"] * len(pks))})',
+                pks,
+            )
+
+    def index(self, queryset):
+        pks = list(queryset.values_list('pk', flat=True))
+        if not pks:
+            return 0
+        self.remove(pks)
+        names = fold_sql("group_concat(i.name, ' ')")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, text, ingredients) '
+                f'SELECT r.id, {fold_sql("r.name")}, {fold_sql("r.text")}, ('
+                f' SELECT {names}'
+                ' FROM recipes_ingredientrecipe ir'
+                ' JOIN recipes_ingredient i ON i.id = ir.ingredient_id'
+                ' WHERE ir.recipe_id = r.id'
+                ') FROM recipes_recipe r '
+                f'WHERE r.id IN ({", ".join(["%s"] * len(pks))})',
+                pks,
+            )
+        return len(pks)
+
+    def search(self, queryset, query):
+        words = terms(query)
+        if not words:
+            return queryset.none()
+        match = ' '.join(f'"{word}"*' for word in words)
+        return queryset.filter(
+            search_document__document__match=match
+        ).annotate(
+            search_rank=-Bm25(
+                F('search_document__document'), *map(Value, BM25_WEIGHTS)
+            ),
+        ).order_by('-search_rank', '-pub_date', '-id')
+
+
+class LikeSearch:
+    def index(self, queryset):
+        return 0
+
+    def remove(self, pks):
+        pass
+
+    def search(self, queryset, query):
+        condition = Q()
+        for word in terms(query):
+            condition &= (
+                Q(name__icontains=word)
+                | Q(text__icontains=word)
+                | Q(ingredients__name__icontains=word)
+            )
+        return queryset.filter(
+            pk__in=Recipe.objects.filter(condition).values('pk')
+        )
+
+
+ENGINES = {
+    'postgresql': PostgresSearch(),
+    'sqlite': SqliteSearch(),
+}
+
+
+def get_engine():
+    return ENGINES.get(connection.vendor, LikeSearch())
+
+
+def reindex(queryset=None):
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    return get_engine().index(queryset)
+
+
+def reindex_on_commit(pks):
+    if not connection.in_atomic_block:
+        return reindex(Recipe.objects.filter(pk__in=set(pks)))
+    queue = connection.run_on_commit
+    pending = getattr(connection, 'pending_reindex', None)
+    if pending is None or pending[0] is not queue:
+        pending = connection.pending_reindex = (queue, set())
+        transaction.on_commit(
+            lambda: reindex(Recipe.objects.filter(pk__in=pending[1]))
+        )
+    pending[1].update(pks)
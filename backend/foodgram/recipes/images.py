@@ -0,0 +1,133 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .cache import bump_generations, recipe_generation
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = 'recipes/variants'
+PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='recipe-images',
+            )
+    return _executor
+
+
+def variant_name(variant, extension):
+    return f'{VARIANTS_DIR}/{variant}.{extension}'
+
+
+def encode(image, extension):
+    if extension == 'jpeg' and image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        PIL_FORMATS[extension],
+        **settings.RECIPE_IMAGE_FORMATS[extension]
+    )
+    return ContentFile(buffer.getvalue())
+
+
+def render_variants(image_name):
+    with default_storage.open(image_name) as source:
+        original = Image.open(source)
+        original.draft('RGB', max(settings.RECIPE_IMAGE_VARIANTS.values()))
+        original = ImageOps.exif_transpose(original)
+        original = original.convert(
+            'RGBA' if 'A' in original.getbands() else 'RGB'
+        )
+    variants = {}
+    for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        image = original.copy()
+        image.thumbnail(size, Image.LANCZOS)
+        variants[variant] = {}
+        for extension in settings.RECIPE_IMAGE_FORMATS:
+            variants[variant][extension] = default_storage.save(
+                variant_name(variant, extension), encode(image, extension)
+            )
+    return variants
+
+
+def build_variants(recipe_id):
+    image = Recipe.objects.filter(pk=recipe_id).values_list(
+        'image', flat=True
+    ).first()
+    if not image:
+        return None
+    variants = Recipe.objects.filter(image=image).exclude(
+        pk=recipe_id
+    ).exclude(image_variants={}).values_list(
+        'image_variants', flat=True
+    ).first()
+    if not variants:
+        variants = render_variants(image)
+    updated = Recipe.objects.filter(
+        pk=recipe_id, image=image
+    ).update(image_variants=variants)
+    if not updated:
+        return None
+    bump_generations('feed', recipe_generation(recipe_id))
+    return variants
+
+
+def referenced_files():
+    names = set()
+    recipes = Recipe.objects.exclude(image__isnull=True).exclude(image='')
+    for image, variants in recipes.values_list(
+        'image', 'image_variants'
+    ).iterator():
+        names.add(image)
+        for files in variants.values():
+            names.update(files.values())
+    return names
+
+
+def release_image(image, variants):
+    if not image or Recipe.objects.filter(image=image).exists():
+        return
+    default_storage.delete(image)
+    for files in variants.values():
+        for name in files.values():
+            default_storage.delete(name)
+
+
+def run_in_worker(recipe_id):
+    close_old_connections()
+    try:
+        build_variants(recipe_id)
+    except Exception:
+        logger.exception('Не удалось обработать картинку рецепта %s',
+                         recipe_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(recipe_id):
+    if not settings.RECIPE_IMAGE_WORKERS:
+        transaction.on_commit(lambda: build_variants(recipe_id))
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(run_in_worker, recipe_id)
+    )
@@ -0,0 +1,127 @@
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict, namedtuple
+from itertools import islice
+
+from pytils.translit import translify
+
+from .models import Ingredient
+
+IndexData = namedtuple('IndexData', ('entries', 'keys', 'grams', 'postings'))
+
+
+def normalize(value):
+    return value.casefold().replace('ё', 'е').strip()
+
+
+def trigrams(value):
+    padded = f'  {value} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class IngredientIndex:
+    similarity_threshold = 0.5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._data = None
+
+    @staticmethod
+    def keys_for(name):
+        key = normalize(name)
+        latin = normalize(translify(key, strict=False))
+        return {key, latin}
+
+    def build(self):
+        entries = list(
+            Ingredient.objects.values('id', 'name', 'measurement_unit')
+            .order_by('name', 'id')
+        )
+        keys = sorted(
+            (key, position)
+            for position, entry in enumerate(entries)
+            for key in self.keys_for(entry['name'])
+        )
+        grams = [(position, trigrams(key)) for key, position in keys]
+        postings = defaultdict(list)
+        for number, (position, key_grams) in enumerate(grams):
+            for gram in key_grams:
+                postings[gram].append(number)
+        return IndexData(entries, keys, grams, dict(postings))
+
+    def load(self):
+        with self._lock:
+            if self._data is not None:
+                return self._data
+            generation = self._generation
+        data = self.build()
+        with self._lock:
+            if generation == self._generation:
+                self._data = data
+        return data
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._data = None
+
+    @staticmethod
+    def prefix_matches(data, query):
+        positions = set()
+        start = bisect_left(data.keys, (query, -1))
+        for key, position in islice(data.keys, start, None):
+            if not key.startswith(query):
+                break
+            positions.add(position)
+        return sorted(positions)
+
+    @staticmethod
+    def substring_matches(data, query):
+        return sorted({
+            position for key, position in data.keys if query in key
+        })
+
+    def fuzzy_matches(self, data, query):
+        query_grams = trigrams(query)
+        shared = Counter(
+            number
+            for gram in query_grams
+            for number in data.postings.get(gram, ())
+        )
+        scores = {}
+        for number, count in shared.items():
+            position, key_grams = data.grams[number]
+            similarity = (
+                count / len(query_grams),
+                count / (len(query_grams) + len(key_grams) - count),
+            )
+            if similarity[0] >= self.similarity_threshold:
+                scores[position] = max(
+                    scores.get(position, similarity), similarity
+                )
+        return sorted(scores, key=lambda position: (
+            [-score for score in scores[position]], position
+        ))
+
+    def search(self, prefix):
+        data = self.load()
+        return [
+            data.entries[position]
+            for position in self.prefix_matches(data, normalize(prefix))
+        ]
+
+    def search_ranked(self, query, limit):
+        data = self.load()
+        query = normalize(query)
+        found = {}
+        for matcher in (self.prefix_matches, self.substring_matches,
+                        self.fuzzy_matches):
+            for position in matcher(data, query):
+                found.setdefault(position, None)
+            if len(found) >= limit:
+                break
+        return [data.entries[position] for position in islice(found, limit)]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,66 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.utils import load_backend
+
+BACKEND = 'foodgram.db.postgresql'
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает накладные расходы на соединение с базой: новое '
+            'соединение на запрос, постоянное соединение и пул')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+
+    def modes(self):
+        return {
+            'new': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+            'persistent': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True},
+            'pooled': {
+                'CONN_MAX_AGE': 0,
+                'CONN_HEALTH_CHECKS': True,
+                'OPTIONS': {'pool': {'max_size': 1, 'timeout': 5}},
+            },
+        }
+
+    def measure(self, mode, overrides, requests):
+        settings_dict = {
+            **connection.settings_dict,
+            'ENGINE': BACKEND,
+            'OPTIONS': {},
+            **overrides,
+        }
+        wrapper = load_backend(BACKEND).DatabaseWrapper(
+            settings_dict, alias=f'bench-{mode}'
+        )
+        timings = []
+        try:
+            for _ in range(requests):
+                started = time.perf_counter()
+                wrapper.close_if_unusable_or_obsolete()
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+                wrapper.close_if_unusable_or_obsolete()
+                timings.append(time.perf_counter() - started)
+        finally:
+            wrapper.close()
+            if wrapper.pool is not None:
+                wrapper.pool.close()
+        return timings
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Замер имеет смысл только для PostgreSQL')
+        self.stdout.write(f'{"mode":<12} {"mean ms":>9} {"p50 ms":>9} '
+                          f'{"p95 ms":>9}')
+        for mode, overrides in self.modes().items():
+            timings = self.measure(mode, overrides, options['requests'])
+            quantiles = statistics.quantiles(timings, n=100)
+            self.stdout.write(
+                f'{mode:<12} {statistics.mean(timings) * 1000:>9.2f} '
+                f'{quantiles[49] * 1000:>9.2f} {quantiles[94] * 1000:>9.2f}'
+            )
@@ -0,0 +1,41 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from recipes.cache import reference_key
+from recipes.models import ChangeCounter, Ingredient, Tag
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает запросы в секунду справочников без кеша и с кешем'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+
+    def run(self, client, url, requests, before_each=None):
+        started = time.perf_counter()
+        for _ in range(requests):
+            if before_each is not None:
+                before_each()
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+        return requests / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        client = APIClient()
+        requests = options['requests']
+        self.stdout.write(f'{"endpoint":<20} {"uncached rps":>14} '
+                          f'{"cached rps":>12}')
+        for url, model in (('/api/tags/', Tag),
+                           ('/api/ingredients/', Ingredient)):
+            counter = ChangeCounter.get_for_model(model)
+            key = reference_key(counter.table, counter.version)
+            uncached = self.run(
+                client, url, requests, lambda: cache.delete(key)
+            )
+            cached = self.run(client, url, requests)
+            self.stdout.write(
+                f'{url:<20} {uncached:>14.1f} {cached:>12.1f}'
+            )
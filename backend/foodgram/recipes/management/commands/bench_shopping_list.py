@@ -0,0 +1,50 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from recipes.exporters import SHOPPING_LIST_EXPORTERS
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает память и время выгрузки списка покупок по форматам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[10, 1000, 10000]
+        )
+
+    @staticmethod
+    def rows(count):
+        for number in range(count):
+            yield {
+                'ingredient_id': number,
+                'name': f'ингредиент {number}',
+                'measurement_unit': 'г',
+                'total': number % 1000 + 1,
+            }
+
+    def measure(self, exporter, count):
+        size = 0
+        tracemalloc.start()
+        started = time.perf_counter()
+        for chunk in exporter.export(self.rows(count)):
+            size += len(chunk)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return elapsed, peak, size
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"format":<6} {"lines":>7} {"ms":>10} '
+            f'{"peak KiB":>10} {"size KiB":>10}'
+        )
+        for exporter_class in SHOPPING_LIST_EXPORTERS:
+            exporter = exporter_class()
+            for count in options['sizes']:
+                elapsed, peak, size = self.measure(exporter, count)
+                self.stdout.write(
+                    f'{exporter.format:<6} {count:>7} {elapsed * 1000:>10.1f} '
+                    f'{peak / 1024:>10.1f} {size / 1024:>10.1f}'
+                )
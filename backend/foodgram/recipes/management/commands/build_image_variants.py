@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import build_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создает уменьшенные копии картинок рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true')
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='').exclude(image=None)
+        if options['missing']:
+            recipes = recipes.filter(image_variants={})
+        built = 0
+        for recipe_id in recipes.values_list('pk', flat=True).iterator():
+            if build_variants(recipe_id):
+                built += 1
+        self.stdout.write(f'Обработано картинок: {built}')
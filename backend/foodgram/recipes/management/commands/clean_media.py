@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.images import referenced_files
+
+
+class Command(BaseCommand):
+    help = 'Удаляет картинки рецептов, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=60)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def files(self, directory):
+        directories, files = default_storage.listdir(directory)
+        for name in files:
+            yield f'{directory}/{name}'
+        for child in directories:
+            yield from self.files(f'{directory}/{child}')
+
+    def handle(self, *args, min_age, dry_run, **options):
+        referenced = referenced_files()
+        threshold = timezone.now() - timedelta(minutes=min_age)
+        removed = 0
+        for name in self.files('recipes'):
+            if name in referenced:
+                continue
+            if default_storage.get_modified_time(name) > threshold:
+                continue
+            if not dry_run:
+                default_storage.delete(name)
+            removed += 1
+        self.stdout.write(f'Удалено файлов: {removed}')
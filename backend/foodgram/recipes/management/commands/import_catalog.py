@@ -0,0 +1,51 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.catalog import READERS, CatalogImporter, reader_for
+
+
+class Command(BaseCommand):
+    help = 'Импортирует теги, ингредиенты и рецепты из JSON или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument(
+            '--model', choices=CatalogImporter.order, default=None
+        )
+        parser.add_argument('--format', choices=READERS, default=None)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def records(self, paths, model, file_format):
+        for path in paths:
+            reader = reader_for(path, file_format)
+            if path == '-':
+                yield from reader(sys.stdin, model)
+                continue
+            with open(path, encoding='utf-8-sig', newline='') as stream:
+                yield from reader(stream, model)
+
+    def progress(self, report):
+        self.stdout.write(
+            f'Импортировано: {sum(report["imported"].values())}, '
+            f'ошибок: {report["error_count"]}, '
+            f'{report["per_second"]} записей/с'
+        )
+
+    def handle(self, *args, paths, model, **options):
+        importer = CatalogImporter(
+            batch_size=options['batch_size'],
+            progress=self.progress if options['verbosity'] else None,
+        )
+        try:
+            report = importer.run(
+                self.records(paths, model, options['format'])
+            )
+        except (ValueError, OSError) as error:
+            raise CommandError(f'Не удалось прочитать данные: {error}')
+        for error in report['errors']:
+            self.stderr.write(f'Запись {error["record"]}: {error["errors"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {report["seconds"]} с: {report["imported"]}, '
+            f'ошибок: {report["error_count"]}'
+        ))
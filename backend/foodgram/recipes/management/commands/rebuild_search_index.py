@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.fulltext import reindex
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс рецептов'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        self.stdout.write(f'Проиндексировано рецептов: {reindex()}')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.cache import bump_generations
+from recipes.counters import recount_recipes, recount_users
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики избранного, покупок, рецептов и подписчиков'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        recipes = recount_recipes()
+        users = recount_users()
+        transaction.on_commit(lambda: bump_generations('catalog'))
+        self.stdout.write(
+            f'Пересчитано рецептов: {recipes}, пользователей: {users}'
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.cache import bump_generations
+from recipes.scores import refresh_popularity, refresh_trending
+
+
+class Command(BaseCommand):
+    help = 'Обновляет рейтинги популярности рецептов'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        popular = refresh_popularity()
+        trending, reset = refresh_trending()
+        transaction.on_commit(lambda: bump_generations('feed'))
+        self.stdout.write(
+            f'Популярность обновлена у {popular} рецептов, '
+            f'тренды у {trending}, сброшены у {reset}'
+        )
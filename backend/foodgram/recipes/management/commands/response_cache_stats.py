@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipes.cache import response_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кеша ответов для анонимов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true')
+
+    def handle(self, *args, **options):
+        stats = response_stats(reset=options['reset'])
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total * 100 if total else 0
+        self.stdout.write(
+            f'Попаданий: {stats["hits"]}, промахов: {stats["misses"]}, '
+            f'доля попаданий: {ratio:.1f}%'
+        )
@@ -0,0 +1,131 @@
+import json
+import logging
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from recipes.benchmarks import (InProcessClient, LiveClient, benchmark_user,
+                                compare, get_token, run_scenario, scenarios)
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержки, число запросов к базе и пропускную '
+            'способность основных эндпоинтов API')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--scenario', nargs='+', default=None)
+        parser.add_argument(
+            '--base-url', default=None,
+            help='Адрес запущенного сервера, например http://127.0.0.1:8000'
+        )
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--output', default=None)
+        parser.add_argument('--baseline', default=None)
+        parser.add_argument(
+            '--max-regression', type=float, default=None,
+            help='Допустимый рост p95 в процентах относительно baseline'
+        )
+
+    def get_client(self, token, base_url, concurrency):
+        if base_url:
+            return LiveClient(token, base_url)
+        if concurrency > 1:
+            raise CommandError(
+                '--concurrency поддерживается только вместе с --base-url'
+            )
+        return InProcessClient(token)
+
+    def run(self, client, selected, options):
+        results = {}
+        self.stdout.write(
+            f'{"scenario":<24} {"p50":>8} {"p95":>8} {"p99":>8} '
+            f'{"queries":>8} {"rps":>8} {"errors":>7}'
+        )
+        for name, path, params, auth in scenarios():
+            if selected and name not in selected:
+                continue
+            result = results[name] = run_scenario(
+                client, path, params, auth, options['requests'],
+                warmup=options['warmup'],
+                concurrency=options['concurrency'],
+            )
+            queries = result['queries']
+            self.stdout.write(
+                f'{name:<24} {result["p50_ms"]:>8.1f} '
+                f'{result["p95_ms"]:>8.1f} {result["p99_ms"]:>8.1f} '
+                f'{"-" if queries is None else queries:>8} '
+                f'{result["throughput"]:>8.1f} {result["errors"]:>7}'
+            )
+        return results
+
+    def report_changes(self, changes, max_regression):
+        regressions = []
+        for name, metrics in changes.items():
+            line = ', '.join(
+                f'{metric} {values["before"]} -> {values["after"]}'
+                + ('' if values['change'] is None
+                   else f' ({values["change"]:+.1f}%)')
+                for metric, values in metrics.items()
+            )
+            self.stdout.write(f'{name}: {line}')
+            p95 = metrics.get('p95_ms')
+            queries = metrics.get('queries')
+            if max_regression is None:
+                continue
+            if p95 and p95['change'] and p95['change'] > max_regression:
+                regressions.append(f'{name}: p95 {p95["change"]:+.1f}%')
+            if queries and queries['after'] > queries['before']:
+                regressions.append(
+                    f'{name}: запросов {queries["before"]} -> '
+                    f'{queries["after"]}'
+                )
+        return regressions
+
+    def handle(self, *args, **options):
+        user = benchmark_user()
+        if user is None:
+            raise CommandError(
+                'Нет данных для замеров, сначала выполните seed_data'
+            )
+        client = self.get_client(
+            get_token(user), options['base_url'], options['concurrency']
+        )
+        metrics_logger = logging.getLogger('foodgram.requests')
+        level = metrics_logger.level
+        metrics_logger.setLevel(logging.ERROR)
+        try:
+            with override_settings(
+                REQUEST_METRICS_SAMPLE_RATE=1.0,
+                REQUEST_METRICS_SERVER_TIMING=True,
+            ):
+                results = self.run(client, options['scenario'], options)
+        finally:
+            metrics_logger.setLevel(level)
+        report = {
+            'meta': {
+                'vendor': connection.vendor,
+                'base_url': options['base_url'],
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'python': platform.python_version(),
+            },
+            'scenarios': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        if not options['baseline']:
+            return
+        with open(options['baseline'], encoding='utf-8') as baseline:
+            changes = compare(results, json.load(baseline)['scenarios'])
+        regressions = self.report_changes(
+            changes, options['max_regression']
+        )
+        if regressions:
+            raise CommandError(
+                'Производительность ухудшилась: ' + '; '.join(regressions)
+            )
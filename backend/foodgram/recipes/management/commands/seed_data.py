@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.seeding import seed
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу тестовыми пользователями, рецептами, '
+            'подписками, избранным и списками покупок')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--ingredients', type=int, default=0)
+        parser.add_argument('--tags', type=int, default=3)
+        parser.add_argument('--follows', type=int, default=20)
+        parser.add_argument('--favorites', type=int, default=50)
+        parser.add_argument('--carts', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--random-seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with transaction.atomic():
+            seeded = seed(
+                users=options['users'],
+                recipes=options['recipes'],
+                ingredients_per_recipe=options['ingredients_per_recipe'],
+                ingredients=options['ingredients'],
+                tags=options['tags'],
+                follows=options['follows'],
+                favorites=options['favorites'],
+                carts=options['carts'],
+                batch_size=options['batch_size'],
+                random_seed=options['random_seed'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(seeded["users"])}, '
+            f'рецептов: {len(seeded["recipes"])} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,85 @@
+# Generated by Django 3.2.5 on 2026-10-18 20:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Replace
+
+FTS_TABLE = 'recipes_recipe_fts'
+
+
+def fold(expression):
+    return Replace(
+        Replace(
+            expression, Value('ё'), Value('е'), output_field=TextField()
+        ),
+        Value('Ё'),
+        Value('Е'),
+        output_field=TextField(),
+    )
+
+
+def fold_sql(column):
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def build_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+            'name, text, ingredients, '
+            'tokenize="unicode61 remove_diacritics 2")'
+        )
+        names = fold_sql("group_concat(i.name, ' ')")
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, text, ingredients) '
+            f'SELECT r.id, {fold_sql("r.name")}, {fold_sql("r.text")}, ('
+            f' SELECT {names}'
+            ' FROM recipes_ingredientrecipe ir'
+            ' JOIN recipes_ingredient i ON i.id = ir.ingredient_id'
+            ' WHERE ir.recipe_id = r.id'
+            ') FROM recipes_recipe r'
+        )
+    elif vendor == 'postgresql':
+        Recipe = apps.get_model('recipes', 'Recipe')
+        IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+        names = Subquery(
+            IngredientRecipe.objects.filter(recipe_id=OuterRef('pk'))
+            .order_by().values('recipe_id')
+            .annotate(names=StringAgg('ingredient__name', ' '))
+            .values('names')
+        )
+        Recipe.objects.update(search_vector=(
+            SearchVector(fold(F('name')), weight='A', config='russian')
+            + SearchVector(fold(F('text')), weight='B', config='russian')
+            + SearchVector(fold(names), weight='C', config='russian')
+        ))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0025_ingredientrecipe_recipe_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый документ'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_vector_idx'),
+        ),
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
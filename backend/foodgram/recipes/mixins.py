@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from .cache import (count_response, get_generations, get_reference_blob,
+                    recipe_generation, response_key)
+from .models import ChangeCounter
+
+
+class ConditionalGetMixin:
+    def get_change_counter(self):
+        if not hasattr(self, '_change_counter'):
+            self._change_counter = ChangeCounter.get_for_model(
+                self.queryset.model
+            )
+        return self._change_counter
+
+    def get_validators(self):
+        counter = self.get_change_counter()
+        etag = quote_etag(f'{counter.table}-{counter.version}')
+        last_modified = None
+        if counter.updated is not None:
+            last_modified = int(counter.updated.timestamp())
+        return etag, last_modified
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class CachedListMixin(ConditionalGetMixin):
+    def list(self, request, *args, **kwargs):
+        return self.conditional(self.cached_list, request, *args, **kwargs)
+
+    def cached_list(self, request, *args, **kwargs):
+        blob = get_reference_blob(self.get_change_counter(), self.render_list)
+        return HttpResponse(blob, content_type=JSONRenderer.media_type)
+
+    def render_list(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer(queryset, many=True)
+        return JSONRenderer().render(serializer.data)
+
+
+class AnonymousCacheMixin:
+    def list(self, request, *args, **kwargs):
+        return self.anonymous_cached(
+            super().list, ('catalog', 'feed'), request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = str(kwargs.get(self.lookup_url_kwarg or self.lookup_field))
+        if not pk.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        return self.anonymous_cached(
+            super().retrieve, ('catalog', recipe_generation(pk)),
+            request, *args, **kwargs
+        )
+
+    def anonymous_cached(self, handler, generations, request, *args,
+                         **kwargs):
+        timeout = settings.RECIPE_RESPONSE_CACHE_TIMEOUT
+        if not timeout or not request.user.is_anonymous:
+            return handler(request, *args, **kwargs)
+        key = response_key(self.action, get_generations(*generations), request)
+        blob = cache.get(key)
+        hit = blob is not None
+        count_response(hit)
+        if not hit:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            blob = JSONRenderer().render(response.data)
+            cache.set(key, blob, timeout)
+        response = HttpResponse(blob, content_type=JSONRenderer.media_type)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        patch_vary_headers(response, ('Authorization',))
+        return response
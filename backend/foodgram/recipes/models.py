@@ -1,10 +1,35 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import F, Prefetch, Sum
+from django.utils import timezone
 from pytils.translit import slugify
 
 User = get_user_model()
 
 
+class ChangeCounter(models.Model):
+    table = models.CharField("Таблица", max_length=100, unique=True)
+    version = models.PositiveBigIntegerField("Версия", default=0)
+    updated = models.DateTimeField("Изменено", null=True)
+
+    @classmethod
+    def get_for_model(cls, model):
+        table = model._meta.db_table
+        return cls.objects.filter(table=table).first() or cls(table=table)
+
+    @classmethod
+    @transaction.atomic
+    def bump(cls, model):
+        table = model._meta.db_table
+        cls.objects.get_or_create(table=table)
+        cls.objects.filter(table=table).update(
+            version=F('version') + 1,
+            updated=timezone.now(),
+        )
+
+
 class Tag(models.Model):
     name = models.CharField("Название", max_length=200)
     color = models.CharField("Цвет", max_length=200, blank=True)
@@ -23,10 +48,31 @@ class Ingredient(models.Model):
         max_length=10
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "measurement_unit"],
+                name="unique_ingredient"
+            ),
+        ]
+
     def __str__(self):
         return self.name[:15]
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_relations(self):
+        return self.select_related('author').defer(
+            'search_vector'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_ingredients',
+                queryset=IngredientRecipe.objects.select_related('ingredient')
+            ),
+        )
+
+
 class Recipe(models.Model):
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -41,6 +87,11 @@ class Recipe(models.Model):
         blank=True,
         null=True,
     )
+    image_variants = models.JSONField(
+        "Уменьшенные копии картинки",
+        default=dict,
+        editable=False
+    )
     name = models.CharField("Название", max_length=200)
     text = models.TextField("Описание", max_length=3000)
     cooking_time = models.IntegerField(
@@ -55,16 +106,73 @@ class Recipe(models.Model):
     pub_date = models.DateTimeField(
         "Дата публикации",
         auto_now_add=True,
-        db_index=True
+    )
+    favorites_count = models.PositiveIntegerField(
+        "Добавлений в избранное",
+        default=0,
+        editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        "Добавлений в список покупок",
+        default=0,
+        editable=False
+    )
+    popularity_score = models.FloatField(
+        "Популярность",
+        default=0,
+        editable=False
+    )
+    trending_score = models.FloatField(
+        "Популярность за последнее время",
+        default=0,
+        editable=False
+    )
+    search_vector = SearchVectorField(
+        "Поисковый документ",
+        null=True,
+        editable=False
     )
 
+    objects = RecipeQuerySet.as_manager()
+
     class Meta:
-        ordering = ["-pub_date"]
+        ordering = ["-pub_date", "-id"]
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"],
+                name="recipe_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="recipe_author_pub_date_idx"
+            ),
+            models.Index(
+                fields=["-popularity_score", "-pub_date", "-id"],
+                name="recipe_popularity_idx"
+            ),
+            models.Index(
+                fields=["-trending_score", "-pub_date", "-id"],
+                name="recipe_trending_idx"
+            ),
+            GinIndex(
+                fields=["search_vector"],
+                name="recipe_search_vector_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class IngredientRecipeQuerySet(models.QuerySet):
+    def shopping_list(self, user):
+        return self.filter(recipe__shop_carts__user=user).values(
+            'ingredient_id',
+            name=F('ingredient__name'),
+            measurement_unit=F('ingredient__measurement_unit'),
+        ).annotate(total=Sum('amount')).order_by('name')
+
+
 class IngredientRecipe(models.Model):
     ingredient = models.ForeignKey(
         Ingredient,
@@ -82,6 +190,35 @@ class IngredientRecipe(models.Model):
         verbose_name='Количество ингредиента'
     )
 
+    objects = IngredientRecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["recipe", "ingredient"],
+                name="ingredientrecipe_recipe_idx"
+            ),
+        ]
+
+
+class SearchDocumentField(models.TextField):
+    pass
+
+
+class RecipeSearchDocument(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        related_name="search_document"
+    )
+    document = SearchDocumentField(db_column="recipes_recipe_fts")
+
+    class Meta:
+        managed = False
+        db_table = "recipes_recipe_fts"
+
 
 class Favorite(models.Model):
     user = models.ForeignKey(
@@ -94,6 +231,11 @@ class Favorite(models.Model):
         on_delete=models.CASCADE,
         related_name="favorites"
     )
+    created = models.DateTimeField(
+        "Дата добавления",
+        auto_now_add=True,
+        db_index=True
+    )
 
     class Meta:
         constraints = [
@@ -114,6 +256,11 @@ class ShopingCart(models.Model):
         on_delete=models.CASCADE,
         related_name="shop_carts"
     )
+    created = models.DateTimeField(
+        "Дата добавления",
+        auto_now_add=True,
+        db_index=True
+    )
 
     class Meta:
         constraints = [
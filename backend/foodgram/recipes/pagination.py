@@ -0,0 +1,102 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PageLimitPagination(PageNumberPagination):
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class RecipePagination(PageLimitPagination):
+    cursor_query_param = 'cursor'
+    feed_query_param = 'feed'
+    keyset_feed = 'following'
+    invalid_cursor_message = 'Неверный курсор.'
+    cursor_mode = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        keyset = (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.feed_query_param)
+            == self.keyset_feed
+        )
+        if not keyset or queryset.query.order_by:
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_mode = True
+        self.request = request
+        page_size = self.get_page_size(request)
+        reverse, position = self.decode_cursor(
+            request.query_params.get(self.cursor_query_param)
+        )
+        if position is not None:
+            queryset = queryset.filter(self.after(position, reverse))
+        if reverse:
+            queryset = queryset.order_by('pub_date', 'id')
+        else:
+            queryset = queryset.order_by('-pub_date', '-id')
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.results = results
+        return results
+
+    @staticmethod
+    def after(position, reverse):
+        pub_date, pk = position
+        if reverse:
+            return Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        return Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+
+    def decode_cursor(self, value):
+        if not value:
+            return False, None
+        try:
+            reverse, pub_date, pk = urlsafe_b64decode(
+                value.encode()
+            ).decode().split('|')
+            position = parse_datetime(pub_date), int(pk)
+        except (BinasciiError, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if position[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse == '1', position
+
+    def encode_cursor(self, recipe, reverse):
+        value = f'{int(reverse)}|{recipe.pub_date.isoformat()}|{recipe.pk}'
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(
+            url, self.cursor_query_param,
+            urlsafe_b64encode(value.encode()).decode()
+        )
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        next_link = previous_link = None
+        if self.results and self.has_next:
+            next_link = self.encode_cursor(self.results[-1], False)
+        if self.results and self.has_previous:
+            previous_link = self.encode_cursor(self.results[0], True)
+        return Response(OrderedDict([
+            ('count', None),
+            ('next', next_link),
+            ('previous', previous_link),
+            ('results', data),
+        ]))
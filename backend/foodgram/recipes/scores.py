@@ -0,0 +1,55 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Favorite, Recipe, ShopingCart
+
+
+def popularity():
+    weights = settings.RECIPE_SCORE_WEIGHTS
+    return (F('favorites_count') * weights['favorite']
+            + F('in_carts_count') * weights['cart'])
+
+
+def refresh_popularity():
+    return Recipe.objects.exclude(
+        popularity_score=popularity()
+    ).update(popularity_score=popularity())
+
+
+def trending_scores(now):
+    weights = settings.RECIPE_SCORE_WEIGHTS
+    half_life = settings.RECIPE_TRENDING_HALF_LIFE.total_seconds()
+    since = now - settings.RECIPE_TRENDING_WINDOW
+    scores = defaultdict(float)
+    for model, weight in ((Favorite, weights['favorite']),
+                          (ShopingCart, weights['cart'])):
+        events = model.objects.filter(created__gte=since).values_list(
+            'recipe_id', 'created'
+        )
+        for recipe_id, created in events.iterator():
+            age = (now - created).total_seconds()
+            scores[recipe_id] += weight * 0.5 ** (age / half_life)
+    return scores
+
+
+def refresh_trending(now=None, batch_size=500):
+    scores = trending_scores(now or timezone.now())
+    Recipe.objects.bulk_update(
+        [Recipe(pk=pk, trending_score=score) for pk, score in scores.items()],
+        ['trending_score'],
+        batch_size=batch_size,
+    )
+    stale = [
+        pk for pk in Recipe.objects.filter(
+            trending_score__gt=0
+        ).values_list('pk', flat=True)
+        if pk not in scores
+    ]
+    for start in range(0, len(stale), batch_size):
+        Recipe.objects.filter(
+            pk__in=stale[start:start + batch_size]
+        ).update(trending_score=0)
+    return len(scores), len(stale)
@@ -0,0 +1,109 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from users.models import Follow
+from .cache import bump_generations, drop_tag_ids
+from .counters import recount_recipes, recount_users
+from .fulltext import reindex
+from .ingredient_index import ingredient_index
+from .models import (ChangeCounter, Favorite, Ingredient, IngredientRecipe,
+                     Recipe, ShopingCart, Tag)
+
+User = get_user_model()
+
+
+def next_pk(model):
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    return (last or 0) + 1
+
+
+def reset_sequences(*models):
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+def sample(rng, population, size):
+    return rng.sample(population, min(size, len(population)))
+
+
+def seed(users=20, recipes=200, ingredients_per_recipe=8, follows=5,
+         favorites=20, carts=5, tags=3, ingredients=0, batch_size=1000,
+         random_seed=0):
+    rng = random.Random(random_seed)
+    token = f'seed{next_pk(User)}'
+
+    start = next_pk(Tag)
+    Tag.objects.bulk_create([
+        Tag(pk=start + number, name=f'{token} {number}',
+            slug=f'{token}-{number}', color='#49B64E')
+        for number in range(tags)
+    ], batch_size=batch_size)
+    start = next_pk(Ingredient)
+    Ingredient.objects.bulk_create([
+        Ingredient(pk=start + number, name=f'{token} ингредиент {number}',
+                   measurement_unit='г')
+        for number in range(max(ingredients,
+                                ingredients_per_recipe
+                                - Ingredient.objects.count()))
+    ], batch_size=batch_size)
+    start = next_pk(User)
+    password = make_password(None)
+    User.objects.bulk_create([
+        User(pk=start + number, email=f'{token}-{number}@example.org',
+             username=f'{token}-{number}', first_name='Seed',
+             last_name=str(number), password=password)
+        for number in range(users)
+    ], batch_size=batch_size)
+    user_ids = list(range(start, start + users))
+    start = next_pk(Recipe)
+    Recipe.objects.bulk_create([
+        Recipe(pk=start + number, name=f'{token} рецепт {number}',
+               text='Рецепт для нагрузочного тестирования.',
+               cooking_time=rng.randint(5, 120),
+               author_id=rng.choice(user_ids))
+        for number in range(recipes)
+    ], batch_size=batch_size)
+    recipe_ids = list(range(start, start + recipes))
+    reset_sequences(Tag, Ingredient, User, Recipe)
+
+    tag_ids = list(Tag.objects.values_list('pk', flat=True))
+    ingredient_ids = list(Ingredient.objects.values_list('pk', flat=True))
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in sample(rng, tag_ids, rng.randint(1, 2))
+    ], batch_size=batch_size)
+    IngredientRecipe.objects.bulk_create([
+        IngredientRecipe(recipe_id=recipe_id, ingredient_id=ingredient_id,
+                         amount=rng.randint(1, 500))
+        for recipe_id in recipe_ids
+        for ingredient_id in sample(rng, ingredient_ids,
+                                    ingredients_per_recipe)
+    ], batch_size=batch_size)
+    Follow.objects.bulk_create([
+        Follow(user_id=user_id, following_id=following_id)
+        for user_id in user_ids
+        for following_id in sample(rng, user_ids, follows)
+        if following_id != user_id
+    ], batch_size=batch_size)
+    for model, per_user in ((Favorite, favorites), (ShopingCart, carts)):
+        model.objects.bulk_create([
+            model(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in sample(rng, recipe_ids, per_user)
+        ], batch_size=batch_size)
+
+    recount_recipes()
+    recount_users()
+    reindex(Recipe.objects.filter(pk__in=recipe_ids))
+    for model in (Tag, Ingredient):
+        ChangeCounter.bump(model)
+    ingredient_index.invalidate()
+    drop_tag_ids()
+    transaction.on_commit(lambda: bump_generations('catalog'))
+    return {'users': user_ids, 'recipes': recipe_ids}
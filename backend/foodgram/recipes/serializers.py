@@ -1,45 +1,52 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.db import models, transaction
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from foodgram.metrics import TimedSerializerMixin
 from users.serializers import CustomUserSerializer
+from .cache import bump_generations, recipe_generation
+from .fields import ImageVariantsField, RecipeImageField
+from .fragments import recipe_fragments
+from .fulltext import reindex_on_commit
+from .images import schedule_variants
 from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                      ShopingCart, Tag)
+from .viewer import get_viewer
 
 User = get_user_model()
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         fields = '__all__'
         model = Tag
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         fields = '__all__'
         model = Ingredient
 
 
 class IngredientRecipeSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        source="ingredient",
-        queryset=Ingredient.objects.all()
-    )
+    id = serializers.IntegerField(source='ingredient_id')
 
     class Meta:
         model = IngredientRecipe
         fields = ('id', 'amount')
 
 
-class CreateRecipeSerializer(serializers.ModelSerializer):
+class CreateRecipeSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
     ingredients = IngredientRecipeSerializer(
         many=True,
         source='recipe_ingredients',
     )
-    image = Base64ImageField(max_length=None, use_url=True, required=False)
+    image = RecipeImageField(max_length=None, use_url=True, required=False)
 
     class Meta:
         fields = (
@@ -48,38 +55,50 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         )
         model = Recipe
 
-    def create_ingredients_recipe(self, ingredients,
-                                  new_recipe_ingredients, instance):
-        for ingredient in ingredients:
-            new_recipe_ingredients.append(
-                IngredientRecipe(
-                    recipe=instance,
-                    ingredient=ingredient['ingredient'],
-                    amount=ingredient['amount'],
-                )
-            )
-        IngredientRecipe.objects.bulk_create(new_recipe_ingredients)
+    def save_ingredients(self, recipe, ingredients, existing=()):
+        rows = defaultdict(list)
+        for row in existing:
+            rows[row.ingredient_id].append(row)
+        created, changed = [], []
+        for item in ingredients:
+            matches = rows[item['ingredient_id']]
+            if not matches:
+                created.append(IngredientRecipe(recipe=recipe, **item))
+                continue
+            row = matches.pop()
+            if row.amount != item['amount']:
+                row.amount = item['amount']
+                changed.append(row)
+        stale = [row.pk for matches in rows.values() for row in matches]
+        if stale:
+            IngredientRecipe.objects.filter(pk__in=stale).delete()
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ['amount'])
+        IngredientRecipe.objects.bulk_create(created)
 
     @transaction.atomic
     def update(self, instance, validated_data):
-        context = self.context['request']
-        tags = validated_data.pop("tags")
-        ingredients = validated_data.pop('recipe_ingredients')
-        instance.author = context.user
-
-        for item in validated_data:
-            if Recipe._meta.get_field(item):
-                setattr(instance, item, validated_data[item])
-        instance.tags.set(tags)
-        instance.recipe_ingredients.all().delete()
-
-        new_recipe_ingredients = []
-        self.create_ingredients_recipe(
-            ingredients,
-            new_recipe_ingredients,
-            instance
-        )
-        instance.save()
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('recipe_ingredients', None)
+        if 'image' in validated_data:
+            validated_data['image_variants'] = {}
+
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        if validated_data:
+            instance.save(update_fields=list(validated_data))
+        if validated_data.get('image'):
+            schedule_variants(instance.pk)
+        if tags is not None:
+            instance.tags.set(tags)
+        if ingredients is not None:
+            self.save_ingredients(
+                instance,
+                ingredients,
+                instance.recipe_ingredients.all()
+            )
+        reindex_on_commit([instance.pk])
+        self.invalidate_responses(instance)
         return instance
 
     @transaction.atomic
@@ -90,25 +109,32 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         ingredients = validated_data.pop("recipe_ingredients")
         recipe = Recipe.objects.create(**validated_data, author=author)
         recipe.tags.set(tags)
-
-        new_recipe_ingredients = []
-        self.create_ingredients_recipe(
-            ingredients,
-            new_recipe_ingredients,
-            instance=recipe
-        )
+        self.save_ingredients(recipe, ingredients)
+        if recipe.image:
+            schedule_variants(recipe.pk)
+        self.invalidate_responses(recipe)
         return recipe
 
-    def validate(self, data):
-        ingredients = self.initial_data.get('ingredients')
-        for ingredient_item in ingredients:
-
-            if int(ingredient_item['amount']) <= 1:
-                raise serializers.ValidationError({
-                    'ingredients': ('Убедитесь, что значение количества '
-                                    'ингредиента больше или равно 1.')
-                })
-        return data
+    @staticmethod
+    def invalidate_responses(recipe):
+        generations = ('feed', recipe_generation(recipe.pk))
+        transaction.on_commit(lambda: bump_generations(*generations))
+
+    def validate_ingredients(self, ingredients):
+        for item in ingredients:
+            if item['amount'] <= 1:
+                raise serializers.ValidationError(
+                    'Убедитесь, что значение количества '
+                    'ингредиента больше или равно 1.'
+                )
+        ids = {item['ingredient_id'] for item in ingredients}
+        missing = ids - Ingredient.objects.in_bulk(ids).keys()
+        if missing:
+            raise serializers.ValidationError(
+                f'Недопустимый первичный ключ "{min(missing)}" - '
+                'объект не существует.'
+            )
+        return ingredients
 
     def validate_cooking_time(self, data):
         cooking_time = self.initial_data.get('cooking_time')
@@ -142,7 +168,15 @@ class IngredientGetRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class GetRecipeSerializer(serializers.ModelSerializer):
+class RecipeFragmentListSerializer(TimedSerializerMixin,
+                                   serializers.ListSerializer):
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        return recipe_fragments(self.child, list(data))
+
+
+class GetRecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     ingredients = IngredientGetRecipeSerializer(
         many=True,
         source='recipe_ingredients'
@@ -150,33 +184,34 @@ class GetRecipeSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True)
     author = CustomUserSerializer()
     image = Base64ImageField(max_length=None, use_url=True, required=False)
+    images = ImageVariantsField(source='image_variants')
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
     class Meta:
         fields = (
             'id', 'tags', 'author', 'ingredients', 'is_favorited',
-            'is_in_shopping_cart', 'name', 'image',
+            'is_in_shopping_cart', 'name', 'image', 'images',
             'text', 'cooking_time',
         )
         model = Recipe
+        list_serializer_class = RecipeFragmentListSerializer
+
+    def to_representation(self, instance):
+        return recipe_fragments(self, [instance])[0]
+
+    def render_fragment(self, instance):
+        return super().to_representation(instance)
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        user = request.user
-        if request is None or user.is_anonymous:
-            return False
-        return ShopingCart.objects.filter(recipe=obj, user=user).exists()
+        return get_viewer(self.context).is_in_shopping_cart(obj)
 
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        user = request.user
-        if request is None or user.is_anonymous:
-            return False
-        return Favorite.objects.filter(recipe=obj, user=user).exists()
+        return get_viewer(self.context).is_favorited(obj)
 
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
+class ShoppingCartSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
     id = serializers.PrimaryKeyRelatedField(
         source="recipe",
         queryset=Recipe.objects.all()
@@ -197,10 +232,13 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
         use_url=True,
         required=False
     )
+    images = ImageVariantsField(source='recipe.image_variants')
 
     class Meta:
         model = ShopingCart
-        fields = ('id', 'name', 'image', 'cooking_time', 'user', 'recipe', )
+        fields = (
+            'id', 'name', 'image', 'images', 'cooking_time', 'user', 'recipe',
+        )
         validators = [
             UniqueTogetherValidator(
                 queryset=ShopingCart.objects.all(),
@@ -222,7 +260,7 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
         return ShopingCart.objects.create(user=user, recipe=recipe)
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     id = serializers.PrimaryKeyRelatedField(
         source="recipe",
         queryset=Recipe.objects.all()
@@ -243,10 +281,13 @@ class FavoriteSerializer(serializers.ModelSerializer):
         use_url=True,
         required=False
     )
+    images = ImageVariantsField(source='recipe.image_variants')
 
     class Meta:
         model = Favorite
-        fields = ('id', 'name', 'image', 'cooking_time', 'user', 'recipe', )
+        fields = (
+            'id', 'name', 'image', 'images', 'cooking_time', 'user', 'recipe',
+        )
         validators = [
             UniqueTogetherValidator(
                 queryset=Favorite.objects.all(),
@@ -266,3 +307,49 @@ class FavoriteSerializer(serializers.ModelSerializer):
         user = request.user
         recipe = validated_data['recipe']
         return Favorite.objects.create(user=user, recipe=recipe)
+
+
+class ImportTagSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=200)
+    color = serializers.CharField(
+        max_length=200,
+        allow_blank=True,
+        default=''
+    )
+    slug = serializers.SlugField(max_length=200, required=False)
+
+
+class ImportIngredientSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=200)
+    measurement_unit = serializers.CharField(max_length=10)
+
+
+class ImportRecipeIngredientSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    name = serializers.CharField(max_length=200, required=False)
+    measurement_unit = serializers.CharField(max_length=10, required=False)
+    amount = serializers.IntegerField(min_value=1)
+
+    def validate(self, data):
+        if 'id' not in data and not (
+            'name' in data and 'measurement_unit' in data
+        ):
+            raise serializers.ValidationError(
+                'Укажите id или название и единицу измерения ингредиента.'
+            )
+        return data
+
+
+class ImportRecipeSerializer(serializers.Serializer):
+    author = serializers.CharField()
+    name = serializers.CharField(max_length=200)
+    text = serializers.CharField(max_length=3000)
+    cooking_time = serializers.IntegerField(min_value=1)
+    tags = serializers.ListField(
+        child=serializers.SlugField(),
+        default=list
+    )
+    ingredients = ImportRecipeIngredientSerializer(
+        many=True,
+        allow_empty=False
+    )
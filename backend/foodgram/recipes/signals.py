@@ -0,0 +1,175 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from users.models import Follow
+from .cache import (bump_generations, drop_reference_blob, drop_tag_ids,
+                    recipe_generation)
+from .counters import shift
+from .fulltext import get_engine, reindex_on_commit
+from .images import release_image
+from .ingredient_index import ingredient_index
+from .models import (ChangeCounter, Favorite, Ingredient, IngredientRecipe,
+                     Recipe, ShopingCart, Tag)
+
+User = get_user_model()
+
+AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name')
+
+COUNTERS = {
+    Favorite: (Recipe, 'recipe_id', 'favorites_count'),
+    ShopingCart: (Recipe, 'recipe_id', 'in_carts_count'),
+    Recipe: (User, 'author_id', 'recipes_count'),
+    Follow: (User, 'following_id', 'followers_count'),
+}
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    transaction.on_commit(ingredient_index.invalidate)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tag_ids(**kwargs):
+    transaction.on_commit(drop_tag_ids)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+def bump_change_counter(sender, **kwargs):
+    ChangeCounter.bump(sender)
+    counter = ChangeCounter.get_for_model(sender)
+    transaction.on_commit(lambda: drop_reference_blob(counter))
+
+
+def invalidate_responses(*generations):
+    transaction.on_commit(lambda: bump_generations(*generations))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def invalidate_recipe_responses(instance, **kwargs):
+    invalidate_responses('feed', recipe_generation(instance.pk))
+
+
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+def invalidate_recipe_ingredient_responses(instance, **kwargs):
+    invalidate_responses('feed', recipe_generation(instance.recipe_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tag_responses(instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        invalidate_responses('catalog')
+    else:
+        invalidate_responses('feed', recipe_generation(instance.pk))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_catalog_responses(**kwargs):
+    invalidate_responses('catalog')
+
+
+@receiver(pre_save, sender=User)
+def remember_author_fields(instance, update_fields=None, **kwargs):
+    instance._stored_author = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+        AUTHOR_FIELDS
+    ):
+        return
+    instance._stored_author = User.objects.filter(pk=instance.pk).values(
+        *AUTHOR_FIELDS
+    ).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_responses(instance, **kwargs):
+    stored = getattr(instance, '_stored_author', None)
+    instance._stored_author = None
+    if not stored or all(
+        stored[field] == getattr(instance, field) for field in AUTHOR_FIELDS
+    ):
+        return
+    recipes = list(instance.recipes.values_list('pk', flat=True))
+    if recipes:
+        invalidate_responses(
+            'feed', *(recipe_generation(pk) for pk in recipes)
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_from_search_index(instance, **kwargs):
+    get_engine().remove([instance.pk])
+
+
+@receiver(post_save, sender=Recipe)
+def reindex_recipe(instance, raw=False, **kwargs):
+    if not raw:
+        reindex_on_commit([instance.pk])
+
+
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+def reindex_recipe_ingredients(instance, raw=False, **kwargs):
+    if not raw:
+        reindex_on_commit([instance.recipe_id])
+
+
+@receiver(post_save, sender=Ingredient)
+def reindex_ingredient_recipes(instance, created, update_fields=None,
+                               raw=False, **kwargs):
+    if created or raw:
+        return
+    if update_fields is not None and 'name' not in update_fields:
+        return
+    reindex_on_commit(IngredientRecipe.objects.filter(
+        ingredient=instance
+    ).values_list('recipe_id', flat=True))
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_stored_image(instance, update_fields=None, **kwargs):
+    if instance.pk is None:
+        return
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    instance._stored_image = Recipe.objects.filter(pk=instance.pk).values(
+        'image', 'image_variants'
+    ).first()
+
+
+@receiver(post_save, sender=Recipe)
+def release_replaced_image(instance, **kwargs):
+    stored = getattr(instance, '_stored_image', None)
+    instance._stored_image = None
+    if stored and stored['image'] != instance.image.name:
+        transaction.on_commit(lambda: release_image(
+            stored['image'], stored['image_variants']
+        ))
+
+
+@receiver(post_delete, sender=Recipe)
+def release_deleted_image(instance, **kwargs):
+    image, variants = instance.image.name, instance.image_variants
+    transaction.on_commit(lambda: release_image(image, variants))
+
+
+def count_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        model, key, field = COUNTERS[sender]
+        shift(model, getattr(instance, key), field, 1)
+
+
+def count_deleted(sender, instance, **kwargs):
+    model, key, field = COUNTERS[sender]
+    shift(model, getattr(instance, key), field, -1)
+
+
+for counted in COUNTERS:
+    post_save.connect(count_created, sender=counted)
+    post_delete.connect(count_deleted, sender=counted)
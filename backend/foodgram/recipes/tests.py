@@ -0,0 +1,496 @@
+import base64
+import json
+import re
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users.models import Follow
+from .cache import get_generations, recipe_generation
+from .catalog import CatalogImporter
+from .filter import RecipesFilter
+from .ingredient_index import ingredient_index
+from .models import Ingredient, IngredientRecipe, Recipe, ShopingCart, Tag
+from .pagination import RecipePagination
+from .seeding import seed
+
+User = get_user_model()
+
+RECIPES_URL = '/api/recipes/'
+IMPORT_URL = '/api/catalog/import/'
+ALLOWED_SCANS = (
+    'recipes_recipe',
+    'recipes_ingredient',
+)
+SEQUENTIAL_SCANS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)()'),
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)( USING)?'),
+}
+
+
+@mock.patch.object(RecipePagination, 'max_page_size', 200)
+class RecipeQueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.anonymous = APIClient()
+
+    def authorized(self, seeded):
+        user_id = Recipe.objects.get(pk=seeded['recipes'][0]).author_id
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(
+            user_id=user_id
+        ).key)
+        return client
+
+    def assert_queries(self, client, url, params, queries):
+        cache.clear()
+        with self.assertNumQueries(queries):
+            response = client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        for size in (3, 50, 200):
+            with self.subTest(size=size):
+                Recipe.objects.all().delete()
+                seeded = seed(
+                    users=5, recipes=size, follows=2, favorites=size,
+                    carts=size,
+                )
+                authorized = self.authorized(seeded)
+                page = self.assert_queries(
+                    self.anonymous, RECIPES_URL, {'limit': size}, 5
+                )
+                self.assertEqual(len(page['results']), size)
+                page = self.assert_queries(
+                    authorized, RECIPES_URL, {'limit': size}, 7
+                )
+                self.assertEqual(len(page['results']), size)
+                detail = f'{RECIPES_URL}{seeded["recipes"][0]}/'
+                self.assert_queries(self.anonymous, detail, {}, 4)
+                self.assert_queries(authorized, detail, {}, 6)
+
+    def test_empty_feed_keeps_page_pagination(self):
+        seed(users=3, recipes=3, follows=1)
+        response = self.anonymous.get(RECIPES_URL, {'feed': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 3)
+
+
+class RecipeFilterPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seeded = seed(users=50, recipes=2000, favorites=50, carts=20)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.user = Recipe.objects.get(pk=seeded['recipes'][0]).author
+
+    def scenarios(self):
+        slugs = list(Tag.objects.values_list('slug', flat=True)[:2])
+        return {
+            'tags': {'tags': slugs},
+            'is_favorited': {'is_favorited': 'true'},
+            'is_in_shopping_cart': {'is_in_shopping_cart': 'true'},
+            'name': {'name': 'ингредиент'},
+            'feed': {'feed': 'following'},
+            'combined': {'tags': slugs, 'is_favorited': 'true'},
+        }
+
+    def sequential_scans(self, plan):
+        return {
+            table for table, using
+            in SEQUENTIAL_SCANS[connection.vendor].findall(plan)
+            if not using and table not in ALLOWED_SCANS
+        }
+
+    def test_filters_do_not_scan_related_tables(self):
+        if connection.vendor not in SEQUENTIAL_SCANS:
+            self.skipTest(f'Планы не проверяются для {connection.vendor}')
+        request = RequestFactory().get('/')
+        request.user = self.user
+        for name, params in self.scenarios().items():
+            with self.subTest(name):
+                plan = RecipesFilter(
+                    params, queryset=Recipe.objects.all(), request=request
+                ).qs.explain()
+                self.assertEqual(self.sequential_scans(plan), set(), plan)
+
+    def test_unknown_tag_slugs_are_ignored(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        slug = Tag.objects.values_list('slug', flat=True).first()
+        with mock.patch('recipes.filter.get_tag_ids', return_value={}):
+            queryset = RecipesFilter(
+                {'tags': [slug]}, queryset=Recipe.objects.all(),
+                request=request,
+            ).qs
+            self.assertFalse(queryset.exists())
+
+
+class CatalogImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        cls.tag = Tag.objects.create(name='Обед', color='#00FF00')
+
+    def recipe(self, name):
+        return 'recipe', {
+            'author': self.admin.email,
+            'name': name,
+            'text': 'текст',
+            'cooking_time': 5,
+            'tags': [self.tag.slug],
+            'ingredients': [{'id': self.ingredient.pk, 'amount': 2}],
+        }
+
+    @override_settings(CATALOG_IMPORT_MAX_BYTES=10)
+    def test_rejects_large_upload(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.post(IMPORT_URL, {'file': SimpleUploadedFile(
+            'tags.json', '[{"name": "Ужин", "color": "#000000"}]'.encode()
+        )})
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(Tag.objects.filter(name='Ужин').exists())
+
+    def test_failed_import_recounts_imported_batches(self):
+        def records():
+            yield self.recipe('Суп')
+            raise ValueError('Некорректный JSON в конце файла.')
+
+        with self.assertRaises(ValueError):
+            CatalogImporter(batch_size=1).run(records())
+        self.admin.refresh_from_db()
+        self.assertEqual(self.admin.recipes_count, 1)
+
+
+class IngredientSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        Ingredient.objects.create(name='сахар', measurement_unit='г')
+
+    def setUp(self):
+        ingredient_index.invalidate()
+        self.client = APIClient()
+
+    def test_name_is_stripped(self):
+        response = self.client.get('/api/ingredients/', {'name': ' сол '})
+        self.assertEqual(
+            [item['name'] for item in response.json()], ['соль']
+        )
+
+    def test_blank_name_is_not_a_filter(self):
+        response = self.client.get('/api/ingredients/', {'name': '   '})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            self.client.get('/api/ingredients/').json(),
+        )
+
+
+def encoded_image(color):
+    buffer = BytesIO()
+    Image.new('RGB', (32, 32), color).save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+@override_settings(RECIPE_IMAGE_WORKERS=0)
+class RecipeImageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            'cook', 'cook@example.com', 'password'
+        )
+        cls.tag = Tag.objects.create(name='Ужин', color='#0000FF')
+        cls.ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def payload(self, color):
+        return {
+            'name': 'Пирог',
+            'text': 'текст',
+            'cooking_time': 30,
+            'tags': [self.tag.pk],
+            'ingredients': [{'id': self.ingredient.pk, 'amount': 200}],
+            'image': encoded_image(color),
+        }
+
+    def variant_files(self, recipe):
+        return [
+            name for files in recipe.image_variants.values()
+            for name in files.values()
+        ]
+
+    def test_replaced_image_gets_its_own_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                RECIPES_URL, self.payload('red'), format='json'
+            )
+        self.assertEqual(response.status_code, 201)
+        recipe = Recipe.objects.get(pk=response.json()['id'])
+        old_files = self.variant_files(recipe)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                f'{RECIPES_URL}{recipe.pk}/', self.payload('blue'),
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        recipe.refresh_from_db()
+        files = self.variant_files(recipe)
+        self.assertTrue(files)
+        self.assertFalse(set(files) & set(old_files))
+        for name in [recipe.image.name, *files]:
+            self.assertTrue(default_storage.exists(name), name)
+        for name in old_files:
+            self.assertFalse(default_storage.exists(name), name)
+
+
+class RecipeCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            'baker', 'baker@example.com', 'password'
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name='сахар', measurement_unit='г'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Кекс', text='текст', cooking_time=40
+        )
+        IngredientRecipe.objects.create(
+            recipe=cls.recipe, ingredient=cls.ingredient, amount=200
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.anonymous = APIClient()
+        self.author_client = APIClient()
+        self.author_client.force_authenticate(self.author)
+        self.detail = f'{RECIPES_URL}{self.recipe.pk}/'
+
+    def change_amount(self, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.author_client.patch(self.detail, {
+                'ingredients': [{'id': self.ingredient.pk, 'amount': amount}]
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    @staticmethod
+    def amounts(data):
+        return [item['amount'] for item in data['ingredients']]
+
+    def test_ingredient_edit_invalidates_anonymous_responses(self):
+        for url in (self.detail, RECIPES_URL):
+            self.anonymous.get(url)
+            self.assertEqual(self.anonymous.get(url)['X-Cache'], 'HIT')
+        self.change_amount(300)
+        response = self.anonymous.get(self.detail)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(self.amounts(response.json()), [300])
+        response = self.anonymous.get(RECIPES_URL)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(
+            self.amounts(response.json()['results'][0]), [300]
+        )
+
+    def test_ingredient_edit_invalidates_fragments(self):
+        self.author_client.get(self.detail)
+        self.author_client.get(RECIPES_URL)
+        self.change_amount(300)
+        response = self.author_client.get(self.detail)
+        self.assertEqual(self.amounts(response.json()), [300])
+        response = self.author_client.get(RECIPES_URL)
+        self.assertEqual(
+            self.amounts(response.json()['results'][0]), [300]
+        )
+
+    def test_author_rename_invalidates_only_their_recipes(self):
+        generations = ('catalog', 'feed', recipe_generation(self.recipe.pk))
+        before = get_generations(*generations)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user('reader', 'reader@example.com', 'pw')
+        self.assertEqual(get_generations(*generations), before)
+        self.anonymous.get(self.detail)
+        self.author.first_name = 'Пекарь'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.save()
+        after = get_generations(*generations)
+        self.assertEqual(after[0], before[0])
+        self.assertNotEqual(after[1:], before[1:])
+        response = self.anonymous.get(self.detail)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['author']['first_name'], 'Пекарь')
+
+
+class ShoppingListTestCase(TestCase):
+    url = '/api/recipes/download_shopping_cart/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            'buyer', 'buyer@example.com', 'password'
+        )
+        recipe = Recipe.objects.create(
+            author=cls.user, name='Чай', text='текст', cooking_time=5
+        )
+        IngredientRecipe.objects.create(
+            recipe=recipe,
+            ingredient=Ingredient.objects.create(
+                name='сахар', measurement_unit='г'
+            ),
+            amount=20,
+        )
+        ShopingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class ShoppingListExportTests(ShoppingListTestCase):
+    def download(self, file_format):
+        response = self.client.get(self.url, {'format': file_format})
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_pdf_export(self):
+        response, content = self.download('pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(content.startswith(b'%PDF'))
+
+    @override_settings(SHOPPING_LIST_PDF_FONT='/missing/NoSuchFont.ttf')
+    def test_pdf_without_font_falls_back_to_text(self):
+        with self.assertLogs('recipes.exporters', 'WARNING'):
+            response, content = self.download('pdf')
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn('сахар - 20г', content.decode())
+
+
+@override_settings(REQUEST_METRICS_SAMPLE_RATE=1.0)
+class RequestMetricsTests(ShoppingListTestCase):
+    def logged(self, logs):
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_streamed_queries_are_counted(self):
+        with self.assertLogs('foodgram.requests', 'INFO') as logs:
+            response = self.client.get(self.url)
+            self.assertEqual(logs.records, [])
+            content = b''.join(response.streaming_content)
+            response.close()
+        record, = self.logged(logs)
+        self.assertGreaterEqual(record['queries'], 1)
+        self.assertEqual(record['bytes'], len(content))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_server_timing_is_not_public(self):
+        with self.assertLogs('foodgram.requests', 'INFO'):
+            response = APIClient().get('/api/tags/')
+        self.assertNotIn('Server-Timing', response)
+        with self.assertLogs('foodgram.requests', 'INFO'):
+            with self.settings(REQUEST_METRICS_SERVER_TIMING=True):
+                response = APIClient().get('/api/tags/')
+        self.assertIn('Server-Timing', response)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Tag.objects.create(name='Завтрак', color='#FFFF00')
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.client.get('/api/tags/')['ETag']
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_changes_etag_and_cached_list(self):
+        etag = self.client.get('/api/tags/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Ужин', color='#0000FF')
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(
+            sorted(tag['name'] for tag in response.json()),
+            ['Завтрак', 'Ужин'],
+        )
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=4, recipes=8, follows=2)
+        cls.expected = list(
+            Recipe.objects.order_by('-pub_date', '-id').values_list(
+                'pk', flat=True
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url, params=None):
+        pages = []
+        while url:
+            data = self.client.get(url, params).json()
+            params = None
+            self.assertIsNone(data['count'])
+            pages.append(data)
+            url = data['next']
+        return pages
+
+    def ids(self, page):
+        return [recipe['id'] for recipe in page['results']]
+
+    def test_cursor_round_trip(self):
+        pages = self.walk(RECIPES_URL, {'cursor': '', 'limit': 3})
+        self.assertEqual(
+            [pk for page in pages for pk in self.ids(page)], self.expected
+        )
+        self.assertIsNone(pages[0]['previous'])
+        previous = self.client.get(pages[-1]['previous']).json()
+        self.assertEqual(self.ids(previous), self.ids(pages[-2]))
+
+    def test_following_feed_pages_through_followed_authors(self):
+        user = Follow.objects.order_by('pk').first().user
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        authors = set(Follow.objects.filter(user=user).values_list(
+            'following_id', flat=True
+        ))
+        pages = self.walk(RECIPES_URL, {'feed': 'following', 'limit': 2})
+        found = [pk for page in pages for pk in self.ids(page)]
+        self.assertTrue(found)
+        self.assertEqual(found, [
+            pk for pk in self.expected
+            if Recipe.objects.get(pk=pk).author_id in authors
+        ])
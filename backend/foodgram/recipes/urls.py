@@ -2,8 +2,9 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from users.views import FollowView, my_subscriptions
 
-from .views import (DownloadShoppingCart, FavoriteView, IngredientViewSet,
-                    RecipeViewSet, ShopingCartView, TagViewSet)
+from .views import (CatalogImportView, DownloadShoppingCart, FavoriteView,
+                    IngredientViewSet, RecipeViewSet, ShopingCartView,
+                    TagViewSet)
 
 v1_router = DefaultRouter()
 v1_router.register('recipes', RecipeViewSet, basename='recipes')
@@ -25,6 +26,10 @@ urlpatterns = [
         'recipes/<int:recipe_id>/shopping_cart/',
         ShopingCartView.as_view(), name='shopping_cart'
     ),
+    path(
+        'catalog/import/',
+        CatalogImportView.as_view()
+    ),
     path('', include(v1_router.urls)),
     path(
         'users/subscriptions/',
@@ -0,0 +1,85 @@
+from django.db.models import CharField, Value
+from django.utils.functional import cached_property
+
+from users.models import Follow
+from .models import Favorite, ShopingCart
+
+
+class ViewerContext:
+    def __init__(self, user=None):
+        self.user = user
+        self.scopes = {}
+        self.found = {}
+
+    @property
+    def anonymous(self):
+        return self.user is None or self.user.is_anonymous
+
+    def _ids(self, model, field):
+        if self.anonymous:
+            return frozenset()
+        return frozenset(
+            model.objects.filter(user=self.user).values_list(field, flat=True)
+        )
+
+    @cached_property
+    def favorite_ids(self):
+        return self._ids(Favorite, 'recipe_id')
+
+    @cached_property
+    def cart_ids(self):
+        return self._ids(ShopingCart, 'recipe_id')
+
+    @cached_property
+    def following_ids(self):
+        return self._ids(Follow, 'following_id')
+
+    def preload(self, recipe_ids, author_ids):
+        if self.anonymous:
+            return
+        lookups = (
+            ('favorite', Favorite, 'recipe_id', recipe_ids),
+            ('cart', ShopingCart, 'recipe_id', recipe_ids),
+            ('following', Follow, 'following_id', author_ids),
+        )
+        queries = [
+            model.objects.filter(
+                user=self.user, **{f'{field}__in': ids}
+            ).annotate(
+                kind=Value(kind, output_field=CharField())
+            ).values_list(field, 'kind').order_by()
+            for kind, model, field, ids in lookups
+        ]
+        for kind, model, field, ids in lookups:
+            self.scopes[kind] = frozenset(ids)
+            self.found[kind] = set()
+        for pk, kind in queries[0].union(*queries[1:], all=True):
+            self.found[kind].add(pk)
+
+    def _has(self, kind, pk, ids):
+        if pk in self.scopes.get(kind, ()):
+            return pk in self.found[kind]
+        return pk in getattr(self, ids)
+
+    def is_favorited(self, recipe):
+        return self._has('favorite', recipe.pk, 'favorite_ids')
+
+    def is_in_shopping_cart(self, recipe):
+        return self._has('cart', recipe.pk, 'cart_ids')
+
+    def follows(self, author_id):
+        return self._has('following', author_id, 'following_ids')
+
+    def is_subscribed(self, author):
+        return self.follows(author.pk)
+
+
+def get_viewer(serializer_context):
+    request = serializer_context.get('request')
+    if request is None:
+        return ViewerContext()
+    viewer = getattr(request, 'viewer', None)
+    if viewer is None:
+        viewer = ViewerContext(request.user)
+        request.viewer = viewer
+    return viewer
@@ -1,18 +1,27 @@
-from collections import defaultdict
-from datetime import datetime
+import io
+import json
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse
+from django.http import QueryDict, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, status, viewsets
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .filter import RecipesFilter, IngredientSearchFilter
+from .catalog import CatalogImporter, reader_for
+from .exporters import SHOPPING_LIST_EXPORTERS, TextExporter
+from .filter import RecipesFilter
+from .ingredient_index import ingredient_index
+from .mixins import AnonymousCacheMixin, CachedListMixin
 from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                      ShopingCart, Tag)
+from .pagination import RecipePagination
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (CreateRecipeSerializer, FavoriteSerializer,
                           GetRecipeSerializer, IngredientSerializer,
@@ -21,30 +30,71 @@ from .serializers import (CreateRecipeSerializer, FavoriteSerializer,
 User = get_user_model()
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(AnonymousCacheMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = CreateRecipeSerializer
     permission_classes = (IsAuthorOrReadOnly, )
     filter_backends = (DjangoFilterBackend, )
     filterset_class = RecipesFilter
+    pagination_class = RecipePagination
+    parser_classes = (JSONParser, MultiPartParser)
+
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return Recipe.objects.only('id', 'pub_date')
+        return super().get_queryset()
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return GetRecipeSerializer
         return self.serializer_class
 
-
-class IngredientViewSet(mixins.ListModelMixin,
+    def get_serializer(self, *args, **kwargs):
+        data = kwargs.get('data')
+        if isinstance(data, QueryDict) and 'data' in data:
+            kwargs['data'] = self.multipart_payload(data)
+        return super().get_serializer(*args, **kwargs)
+
+    @staticmethod
+    def multipart_payload(data):
+        try:
+            payload = json.loads(data['data'])
+        except ValueError as error:
+            raise ParseError(f'Некорректный JSON в поле data: {error}')
+        if not isinstance(payload, dict):
+            raise ParseError('Поле data должно содержать объект JSON.')
+        payload.update((name, data[name]) for name in data if name != 'data')
+        return payload
+
+
+class IngredientViewSet(CachedListMixin,
+                        mixins.ListModelMixin,
                         mixins.RetrieveModelMixin,
                         viewsets.GenericViewSet):
     pagination_class = None
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = [IngredientSearchFilter]
-    search_fields = ['^name']
 
-
-class TagViewSet(mixins.ListModelMixin,
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name', '').strip()
+        if not name:
+            return super().list(request, *args, **kwargs)
+        return self.conditional(self.search, request, name)
+
+    def search(self, request, name):
+        if request.query_params.get('mode') == 'ranked':
+            limit = settings.INGREDIENT_SEARCH_LIMIT
+            try:
+                limit = int(request.query_params['limit'])
+            except (KeyError, ValueError):
+                pass
+            limit = max(1, min(limit, settings.INGREDIENT_SEARCH_LIMIT))
+            return Response(ingredient_index.search_ranked(name, limit))
+        return Response(ingredient_index.search(name))
+
+
+class TagViewSet(CachedListMixin,
+                 mixins.ListModelMixin,
                  mixins.RetrieveModelMixin,
                  viewsets.GenericViewSet):
     pagination_class = None
@@ -124,26 +174,72 @@ class FavoriteView(APIView):
 
 class DownloadShoppingCart(APIView):
     permission_classes = (IsAuthenticated, )
+    renderer_classes = SHOPPING_LIST_EXPORTERS
 
     def get(self, request):
-        user = request.user
-        recipes_id = ShopingCart.objects.filter(
-            user_id=user.id).values_list("recipe", flat=True)
-        ingredient_filter = IngredientRecipe.objects.filter(
-            recipe_id__in=recipes_id).order_by('ingredient')
-
-        ingredients = defaultdict(int)
-        for ingredient in ingredient_filter:
-            ingredients[ingredient.ingredient] += ingredient.amount
-        current_date = datetime.now().date()
-        wishlist = [f"Список покупок на {current_date} \n", "\n"]
-        for ingredient, quantity in ingredients.items():
-            wishlist.append(f'{ingredient.name} - {quantity}'
-                            f'{ingredient.measurement_unit} \n')
-        wishlist.append('\n\n')
-
-        wishlist.append(f'foodgram {current_date.year}')
-
-        response = HttpResponse(wishlist, 'Content-Type: text/plain')
-        response['Content-Disposition'] = 'attachment; filename="wishlist.txt"'
+        exporter = request.accepted_renderer
+        if not exporter.is_available():
+            exporter = TextExporter()
+        rows = IngredientRecipe.objects.shopping_list(request.user)
+        content_type = exporter.media_type
+        if exporter.charset:
+            content_type = f'{content_type}; charset={exporter.charset}'
+        response = StreamingHttpResponse(
+            exporter.export(rows.iterator()),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="wishlist.{exporter.format}"'
+        )
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if getattr(response, 'exception', False):
+            response.accepted_renderer = JSONRenderer()
+            response.accepted_media_type = JSONRenderer.media_type
         return response
+
+
+class CatalogImportView(APIView):
+    permission_classes = (IsAdminUser, )
+    parser_classes = (MultiPartParser, )
+
+    def post(self, request):
+        uploads = request.FILES.getlist('file')
+        if not uploads:
+            return Response(
+                {'file': ['Обязательное поле.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = settings.CATALOG_IMPORT_MAX_BYTES
+        if sum(upload.size for upload in uploads) > limit:
+            return Response(
+                {'file': [
+                    f'Размер файлов больше {limit // 1024 // 1024} МБ. '
+                    'Загрузите их командой import_catalog.'
+                ]},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        importer = CatalogImporter(
+            batch_size=settings.CATALOG_IMPORT_BATCH_SIZE
+        )
+        try:
+            report = importer.run(self.records(uploads, request.data))
+        except ValueError as error:
+            return Response(
+                {'detail': str(error)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(report)
+
+    @staticmethod
+    def records(uploads, data):
+        for upload in uploads:
+            reader = reader_for(upload.name, data.get('format'))
+            stream = io.TextIOWrapper(
+                upload, encoding='utf-8-sig', newline=''
+            )
+            yield from reader(stream, data.get('model'))
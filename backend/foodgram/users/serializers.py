@@ -3,13 +3,16 @@ from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from foodgram.metrics import TimedSerializerMixin
+from recipes.fields import ImageVariantsField
 from recipes.models import Recipe
+from recipes.viewer import get_viewer
 from .models import Follow
 
 User = get_user_model()
 
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -20,34 +23,23 @@ class CustomUserSerializer(serializers.ModelSerializer):
         model = User
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        user = request.user
-        if request is None or user.is_anonymous:
-            return False
-        return Follow.objects.filter(user=user, following=obj).exists()
+        return get_viewer(self.context).is_subscribed(obj)
 
 
 class ShowFollowerRecipeSerializer(serializers.ModelSerializer):
     image = Base64ImageField(max_length=None, use_url=True, required=False)
+    images = ImageVariantsField(source='image_variants')
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'images', 'cooking_time')
 
 
-class ShowFollowersSerializer(serializers.ModelSerializer):
-    recipes = ShowFollowerRecipeSerializer(many=True, read_only=True)
-
-    class Meta:
-        model = User
-        fields = (
-            'email', 'id', 'username', 'first_name',
-            'last_name', 'recipes'
-        )
-
-
-class FollowSerializer(serializers.ModelSerializer):
-    recipes_count = serializers.SerializerMethodField()
+class FollowSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    recipes_count = serializers.IntegerField(
+        source='following.recipes_count',
+        read_only=True
+    )
     is_subscribed = serializers.SerializerMethodField()
     recipes = ShowFollowerRecipeSerializer(many=True, read_only=True)
 
@@ -83,20 +75,11 @@ class FollowSerializer(serializers.ModelSerializer):
         return Follow.objects.create(user=user, following=following)
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request is None:
-            return False
-        return Follow.objects.filter(
-            user=request.user,
-            following=obj.following
-        ).exists()
-
-    def get_recipes_count(self, obj):
-        return obj.following.recipes.count()
+        return get_viewer(self.context).is_subscribed(obj.following)
 
 
-class FollowGetSerializerTest(serializers.ModelSerializer):
-    recipes_count = serializers.SerializerMethodField()
+class FollowGetSerializerTest(TimedSerializerMixin,
+                              serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     recipes = ShowFollowerRecipeSerializer(many=True)
 
@@ -108,13 +91,4 @@ class FollowGetSerializerTest(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request is None:
-            return False
-        return Follow.objects.filter(
-            user=request.user,
-            following=obj
-        ).exists()
-
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        return get_viewer(self.context).is_subscribed(obj)
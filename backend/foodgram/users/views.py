@@ -1,19 +1,35 @@
 from django.contrib.auth import get_user_model
+from django.db.models import OuterRef, Prefetch, Subquery
 from django.shortcuts import get_object_or_404
+from recipes.models import Recipe
+from recipes.pagination import PageLimitPagination
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .models import Follow
-from .serializers import (FollowGetSerializerTest, FollowSerializer,
-                          ShowFollowersSerializer)
+from .serializers import FollowGetSerializerTest, FollowSerializer
 
 User = get_user_model()
 
 
+def with_recipes(users, request):
+    recipes = Recipe.objects.all()
+    try:
+        recipes_limit = int(request.query_params['recipes_limit'])
+    except (KeyError, ValueError):
+        recipes_limit = None
+    if recipes_limit is not None and recipes_limit >= 0:
+        recipes = recipes.filter(pk__in=Subquery(
+            Recipe.objects.filter(
+                author_id=OuterRef('author_id')
+            ).values('pk')[:recipes_limit]
+        ))
+    return users.prefetch_related(Prefetch('recipes', queryset=recipes))
+
+
 class FollowView(APIView):
     permission_classes = (IsAuthenticated, )
 
@@ -27,7 +43,11 @@ class FollowView(APIView):
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        response = FollowGetSerializerTest(following)
+        following = with_recipes(User.objects, request).get(pk=following.pk)
+        response = FollowGetSerializerTest(
+            following,
+            context={'request': request}
+        )
         return Response(
             response.data,
             status=status.HTTP_201_CREATED
@@ -51,14 +71,13 @@ class FollowView(APIView):
 @api_view(['GET', ])
 @permission_classes([IsAuthenticated, ])
 def my_subscriptions(request):
-    user = request.user
-    following = user.followers.all()
-    user_obj = []
-    for follow_obj in following:
-        user_obj.append(follow_obj.following)
-    paginator = PageNumberPagination()
+    following = with_recipes(
+        User.objects.filter(following__user=request.user),
+        request
+    ).order_by('following__id')
+    paginator = PageLimitPagination()
     paginator.page_size = 10
-    result_page = paginator.paginate_queryset(user_obj, request)
-    serializer = ShowFollowersSerializer(
-        result_page, many=True, context={'current_user': request.user})
+    result_page = paginator.paginate_queryset(following, request)
+    serializer = FollowGetSerializerTest(
+        result_page, many=True, context={'request': request})
     return paginator.get_paginated_response(serializer.data)
@@ -0,0 +1,6 @@
+const imageVariant = (images, variant, fallback) => {
+  const files = images && images[variant]
+  return (files && (files.webp || files.jpeg)) || fallback
+}
+
+export default imageVariant